@@ -1,6 +1,7 @@
-from app.core.auth import dependencies
+from app.core.auth import dependencies, validation
 from app.core.exceptions.http_exceptions import UnauthorizedException
-from fastapi import APIRouter, Depends, Response
+from app.core.utils.token_blacklist import revoke_tokens
+from fastapi import APIRouter, Cookie, Depends, Response
 from jwt import InvalidTokenError
 
 router = APIRouter()
@@ -12,11 +13,12 @@ router = APIRouter()
 )
 async def logout(
     response: Response,
+    payload: dict = Depends(validation.get_current_token_payload),
+    refresh_token: str | None = Cookie(alias="refresh_token", default=None),
 ):
     try:
         response.delete_cookie(key="refresh_token")
-
-        # todo: add token to  blacklist
+        await revoke_tokens(payload, refresh_token)
 
         return {"message": "Logged out successfully"}
 
@@ -1,61 +1,72 @@
-from typing import Annotated
+from collections.abc import AsyncGenerator
 
-from app.core import db_helper
 from app.core.auth import dependencies
-from app.core.config import settings
 from app.core.exceptions.http_exceptions import (
     RateLimitException,
 )
 from app.core.logger import logging
-from app.core.utils.rate_limit import is_rate_limited
-from app.crud.crud_rate_limits import crud_rate_limits
-from app.crud.crud_tiers import crud_tiers
+from app.core.utils.concurrency_limit import acquire_slot, release_slot
+from app.core.utils.rate_limit import check_rate_limit, get_request_cost, get_route_path
+from app.core.utils.rate_limit_rules import resolve_limit, resolve_max_concurrency
 from app.models.user import User
-from app.schemas.rate_limit import sanitize_path
-from fastapi import Depends, Request
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import Depends, Request, Response
 
 logger = logging.getLogger(__name__)
 
-DEFAULT_LIMIT = settings.rate_limit.DEFAULT_LIMIT
-DEFAULT_PERIOD = settings.rate_limit.DEFAULT_PERIOD
-
 
 async def rate_limiter(
     request: Request,
-    session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    response: Response,
     user: User | None = Depends(dependencies.get_optional_user),
-) -> None:
-    path = sanitize_path(request.url.path)
+) -> AsyncGenerator[None, None]:
+    # Запрос уже проверен RateLimitMiddleware до аутентификации, заголовки лимита добавит он же.
+    if getattr(request.state, "rate_limit", None) is not None:
+        yield
+        return
+
+    path = get_route_path(request)
     if user:
         user_id = user["id"]
-        tier = await crud_tiers.get(db=session, id=user["tier_id"])
-        if tier:
-            rate_limit = await crud_rate_limits.get(
-                db=session,
-                tier_id=tier["id"],
-                path=path,
-            )
-            if rate_limit:
-                limit, period = rate_limit["limit"], rate_limit["period"]
-            else:
-                logger.warning(
-                    f"User {user_id} with tier '{tier['name']}' has no specific rate limit for path '{path}'. \
-                        Applying default rate limit."
-                )
-                limit, period = DEFAULT_LIMIT, DEFAULT_PERIOD
-        else:
-            logger.warning(f"User {user_id} has no assigned tier. Applying default rate limit.")
-            limit, period = DEFAULT_LIMIT, DEFAULT_PERIOD
+        limit, period, algorithm, sync_hits, cost, cost_per_kb = await resolve_limit(
+            path, user_id=user_id, tier_id=user["tier_id"]
+        )
+        max_concurrency = await resolve_max_concurrency(user_id, user["tier_id"])
     else:
         user_id = request.client.host
-        limit, period = DEFAULT_LIMIT, DEFAULT_PERIOD
+        limit, period, algorithm, sync_hits, cost, cost_per_kb = await resolve_limit(path)
+        max_concurrency = None
 
-    is_limited = await is_rate_limited(
+    result = await check_rate_limit(
         user_id=user_id,
         path=path,
         limit=limit,
         period=period,
+        algorithm=algorithm,
+        sync_hits=sync_hits,
+        cost=get_request_cost(cost, cost_per_kb, request.headers.get("content-length")),
     )
-    if is_limited:
-        raise RateLimitException("Rate limit exceeded.")
+    if result.limited:
+        exception = RateLimitException("Rate limit exceeded.")
+        exception.headers = result.headers
+        raise exception
+
+    response.headers.update(result.headers)
+    if not max_concurrency:
+        yield
+        return
+
+    # Слот одновременных запросов занят до завершения обработчика.
+    token = await acquire_slot(user_id, max_concurrency)
+    if token is None:
+        exception = RateLimitException("Too many concurrent requests.")
+        exception.headers = {"Retry-After": "1"}
+        raise exception
+
+    try:
+        yield
+    finally:
+        await release_slot(user_id, token)
+
+
+async def client_cache() -> None:
+    """Отмечает маршрут для `ClientCacheMiddleware`: его GET-ответы получают ETag, 304 и Cache-Control."""
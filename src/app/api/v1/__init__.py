@@ -2,6 +2,7 @@ from app.core.auth import dependencies
 from app.core.config import settings
 from fastapi import APIRouter, Depends
 
+from .cache import router as cache_router
 from .post import router as post_router
 from .rate_limit import router as rate_limit_router
 from .tasks import router as tasks_router
@@ -45,3 +46,11 @@ router.include_router(
         Depends(dependencies.get_current_superadmin_user),
     ],
 )
+router.include_router(
+    cache_router,
+    tags=["Cache"],
+    prefix=settings.api_v1.cache_prefix,
+    dependencies=[
+        Depends(dependencies.get_current_superadmin_user),
+    ],
+)
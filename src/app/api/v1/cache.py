@@ -0,0 +1,59 @@
+from typing import Any
+
+from app.core.utils import auth_utils, cache_metrics, cache_warmup, queue
+from app.schemas.job import Job
+from fastapi import APIRouter, status
+from fastapi.responses import PlainTextResponse
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def get_cache_metrics() -> list[dict[str, Any]]:
+    """Получить сводку метрик кэша всех воркеров по каждой паре (key_prefix, маршрут).
+
+    Возвращает
+    -------
+    list[dict[str, Any]]
+        Попадания, промахи, доля попаданий, средние задержки чтения и записи, средний размер записи
+        и среднее количество ключей, удаленных одной инвалидацией.
+    """
+    return cache_metrics.summarize(await cache_metrics.read())
+
+
+@router.get("/metrics/prometheus", response_class=PlainTextResponse)
+async def get_cache_metrics_prometheus() -> str:
+    """Получить метрики кэша всех воркеров и состояние пула bcrypt ответившего воркера в текстовом формате Prometheus."""
+    return cache_metrics.render_prometheus(await cache_metrics.read()) + auth_utils.render_password_pool_prometheus()
+
+
+@router.delete("/metrics", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_cache_metrics() -> None:
+    """Обнулить метрики кэша."""
+    await cache_metrics.reset()
+
+
+@router.post("/warmup", response_model=Job, status_code=status.HTTP_201_CREATED)
+async def start_cache_warmup(limit: int | None = None):
+    """Запустить прогрев кэша самыми популярными записями в воркере arq.
+
+    Параметры
+    ----------
+    limit: int | None
+        Сколько самых популярных ключей прогреть. По умолчанию все записанные.
+
+    Возвращает
+    -------
+    dict[str, str]
+        Словарь, содержащий ID задачи. Пока прогрев в очереди или выполняется, повторный запуск возвращает
+        ту же задачу; после завершения ставится новая.
+    """
+    await cache_warmup.flush_hot_keys()
+    job = await queue.pool.enqueue_job("warm_up_cache", limit, _job_id=cache_warmup.WARMUP_JOB_ID)  # type: ignore
+    return {"id": cache_warmup.WARMUP_JOB_ID if job is None else job.job_id}
+
+
+@router.get("/warmup")
+async def get_cache_warmup_progress() -> dict[str, str]:
+    """Получить ход последнего прогрева кэша: status, total, done, failed, started_at, finished_at."""
+    return await cache_warmup.get_progress()
@@ -3,9 +3,12 @@ from typing import Annotated
 
 from app.core import db_helper
 from app.core.auth import dependencies
+from app.core.config import settings
 from app.core.exceptions.http_exceptions import NotFoundException
 from app.core.logger import logging
-from app.crud.crud_posts import crud_posts
+from app.core.utils.cache_warmup import record_hot_key
+from app.core.utils.caching import bump_namespaces, cache, invalidate_entities, invalidate_tags
+from app.crud.crud_posts import crud_posts, get_user_posts_page, user_posts_namespace, user_posts_tag
 from app.crud.crud_users import crud_users
 from app.schemas.post import (
     PostCreate,
@@ -16,10 +19,10 @@ from app.schemas.post import (
 )
 from app.schemas.user import UserRead
 from fastapi import APIRouter, Depends, Request, status
-from fastcrud.paginated import PaginatedListResponse, compute_offset, paginated_response
+from fastcrud.paginated import PaginatedListResponse, paginated_response
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..dependencies import rate_limiter
+from ..dependencies import client_cache, rate_limiter
 
 router = APIRouter()
 
@@ -29,9 +32,18 @@ logger = logging.getLogger(__name__)
 @router.get(
     "/{username}/list",
     response_model=PaginatedListResponse[PostRead],
-    dependencies=[Depends(dependencies.get_current_superadmin_user)],
+    dependencies=[Depends(dependencies.get_current_superadmin_user), Depends(client_cache)],
     tags=["Admin"],
 )
+@cache(
+    key_prefix="user_posts:{username}:{items_per_page}",
+    resource_id_name="page",
+    expiration=60,
+    local_ttl=settings.cache.LOCAL_CACHE_TTL,
+    early_refresh_beta=1.0,
+    raw_response=True,
+    namespaces=["user:{username}", "posts:{username}"],
+)
 async def get_user_posts(
     request: Request,
     username: str,
@@ -49,38 +61,29 @@ async def get_user_posts(
     if not user:
         raise NotFoundException("User not found")
 
-    posts_data = await crud_posts.get_multi(
-        db=session,
-        offset=compute_offset(page, items_per_page),
-        limit=items_per_page,
-        schema_to_select=PostRead,
-        created_by_user_id=user["id"],
-        is_deleted=False,
-    )
+    record_hot_key("user_posts", user["id"], page, items_per_page)
+    posts_data = await get_user_posts_page(session, user["id"], page, items_per_page)
     response = paginated_response(
         crud_data=posts_data,
         page=page,
         items_per_page=items_per_page,
     )
-    logger.info("Cache miss - executing database query")  # Add logging
     return response
 
 
-@router.get("/list", response_model=PaginatedListResponse[PostRead])
+@router.get(
+    "/list",
+    response_model=PaginatedListResponse[PostRead],
+    dependencies=[Depends(client_cache)],
+)
 async def get_my_posts(
     session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
     page: int = 1,
     items_per_page: int = 10,
     current_user: UserRead = Depends(dependencies.get_current_active_auth_user),
 ):
-    posts_data = await crud_posts.get_multi(
-        db=session,
-        offset=compute_offset(page, items_per_page),
-        limit=items_per_page,
-        schema_to_select=PostRead,
-        created_by_user_id=current_user.id,
-        is_deleted=False,
-    )
+    record_hot_key("user_posts", current_user["id"], page, items_per_page)
+    posts_data = await get_user_posts_page(session, current_user["id"], page, items_per_page)
 
     response = paginated_response(
         crud_data=posts_data,
@@ -109,6 +112,8 @@ async def create_my_post(
         db=session,
         object=post_internal,
     )
+    await invalidate_tags(user_posts_tag(current_user["id"]))
+    await bump_namespaces(user_posts_namespace(current_user["username"]))
     print("Returned post from create")
     return created_post
 
@@ -143,6 +148,8 @@ async def update_my_post(
         object=update_internal,
         id=post_id,
     )
+    await invalidate_entities("post", post_id)
+    await bump_namespaces(user_posts_namespace(current_user["username"]))
     return {"message": "Post updated"}
 
 
@@ -157,7 +164,7 @@ async def delete_my_post(
         schema_to_select=PostRead,
         id=post_id,
         is_deleted=False,
-        created_by_user_id=current_user.id,
+        created_by_user_id=current_user["id"],
     )
     if post is None:
         raise NotFoundException("Post not found")
@@ -166,6 +173,9 @@ async def delete_my_post(
         db=session,
         id=post_id,
     )
+    await invalidate_entities("post", post_id)
+    await invalidate_tags(user_posts_tag(current_user["id"]))
+    await bump_namespaces(user_posts_namespace(current_user["username"]))
     return {
         "message": "Post deleted from the database",
     }
@@ -196,7 +206,7 @@ async def delete_user_post(
         schema_to_select=PostRead,
         id=post_id,
         is_deleted=False,
-        created_by_user_id=user.id,
+        created_by_user_id=user["id"],
     )
     if post is None:
         raise NotFoundException("Post not found")
@@ -204,6 +214,9 @@ async def delete_user_post(
         db=session,
         id=post_id,
     )
+    await invalidate_entities("post", post_id)
+    await invalidate_tags(user_posts_tag(user["id"]))
+    await bump_namespaces(user_posts_namespace(username))
     return {
         "message": "Post deleted from the database",
     }
@@ -5,6 +5,7 @@ from app.core.exceptions.http_exceptions import (
     DuplicateValueException,
     NotFoundException,
 )
+from app.core.utils.rate_limit_rules import bump_rules_version
 from app.crud.crud_rate_limits import crud_rate_limits
 from app.crud.crud_tiers import crud_tiers
 from app.schemas.rate_limit import (
@@ -17,12 +18,15 @@ from fastapi import APIRouter, Depends, status
 from fastcrud.paginated import PaginatedListResponse, compute_offset, paginated_response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..dependencies import client_cache
+
 router = APIRouter()
 
 
 @router.get(
     "/{tier_name}/list",
     response_model=PaginatedListResponse[RateLimitRead],
+    dependencies=[Depends(client_cache)],
 )
 async def get_rate_limits(
     tier_name: str,
@@ -55,6 +59,7 @@ async def get_rate_limits(
 @router.get(
     "/{tier_name}/{rate_limit_id}",
     response_model=RateLimitRead,
+    dependencies=[Depends(client_cache)],
 )
 async def get_rate_limit_by_id(
     tier_name: str,
@@ -111,6 +116,7 @@ async def create_rate_limit(
         db=session,
         object=rate_limit_internal,
     )
+    await bump_rules_version()
     return created_rate_limit
 
 
@@ -153,6 +159,7 @@ async def update_rate_limit(
         object=values,
         id=db_rate_limit["id"],
     )
+    await bump_rules_version()
     return {"message": "Rate Limit updated"}
 
 
@@ -185,4 +192,5 @@ async def delete_rate_limit(
         db=session,
         id=db_rate_limit["id"],
     )
+    await bump_rules_version()
     return {"message": "Rate Limit deleted"}
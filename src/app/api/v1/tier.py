@@ -6,6 +6,7 @@ from app.core.exceptions.http_exceptions import (
     DuplicateValueException,
     NotFoundException,
 )
+from app.core.utils.rate_limit_rules import bump_rules_version
 from app.crud.crud_tiers import crud_tiers
 from app.schemas.tier import (
     TierCreate,
@@ -17,13 +18,15 @@ from fastapi import APIRouter, Depends, status
 from fastcrud.paginated import PaginatedListResponse, compute_offset, paginated_response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..dependencies import client_cache
+
 router = APIRouter()
 
 
 @router.get(
     "/list",
     response_model=PaginatedListResponse[TierRead],
-    dependencies=[Depends(dependencies.get_current_superadmin_user)],
+    dependencies=[Depends(dependencies.get_current_superadmin_user), Depends(client_cache)],
 )
 async def get_tiers(
     session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
@@ -47,7 +50,7 @@ async def get_tiers(
 @router.get(
     "/{name}",
     response_model=TierRead,
-    dependencies=[Depends(dependencies.get_current_superadmin_user)],
+    dependencies=[Depends(dependencies.get_current_superadmin_user), Depends(client_cache)],
 )
 async def get_tier(
     name: str,
@@ -86,6 +89,7 @@ async def create_tier(
         db=session,
         object=tier_internal,
     )
+    await bump_rules_version()
     return created_tier
 
 
@@ -111,6 +115,7 @@ async def update_tier(
         object=values,
         name=name,
     )
+    await bump_rules_version()
     return {"message": "Tier updated"}
 
 
@@ -135,4 +140,5 @@ async def delete_tier(
         db=session,
         name=name,
     )
+    await bump_rules_version()
     return {"message": "Tier deleted"}
@@ -2,15 +2,19 @@ from datetime import UTC, datetime
 from typing import Annotated
 
 from app.core import db_helper
-from app.core.auth import dependencies
+from app.core.auth import dependencies, validation
+from app.core.config import settings
 from app.core.exceptions.http_exceptions import (
     DuplicateValueException,
     NotFoundException,
 )
-from app.core.utils.auth_utils import hash_password
+from app.core.utils.auth_utils import hash_password_async
+from app.core.utils.caching import bump_namespaces, cache
+from app.core.utils.principal_cache import invalidate_principals
+from app.core.utils.token_blacklist import revoke_tokens
 from app.crud.crud_rate_limits import crud_rate_limits
 from app.crud.crud_tiers import crud_tiers
-from app.crud.crud_users import crud_users
+from app.crud.crud_users import crud_users, user_namespace
 from app.models.tier import Tier
 from app.schemas.tier import TierRead
 from app.schemas.user import (
@@ -21,10 +25,12 @@ from app.schemas.user import (
     UserUpdate,
     UserUpdateInternal,
 )
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Cookie, Depends, Request, status
 from fastcrud.paginated import PaginatedListResponse, compute_offset, paginated_response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..dependencies import client_cache
+
 router = APIRouter()
 
 
@@ -48,7 +54,7 @@ async def create_user(
         raise DuplicateValueException("Username not available")
 
     user_internal_dict = user.model_dump()
-    user_internal_dict["hashed_password"] = hash_password(password=user_internal_dict["password"])
+    user_internal_dict["hashed_password"] = await hash_password_async(password=user_internal_dict["password"])
     del user_internal_dict["password"]
 
     user_internal = UserCreateInternal(**user_internal_dict)
@@ -59,7 +65,7 @@ async def create_user(
     return created_user
 
 
-@router.get("/me/", response_model=UserRead)
+@router.get("/me/", response_model=UserRead, dependencies=[Depends(client_cache)])
 async def get_my_profile(
     user: UserRead = Depends(dependencies.get_current_active_auth_user),
 ) -> UserRead:
@@ -70,7 +76,7 @@ async def get_my_profile(
     "/",
     response_model=PaginatedListResponse[UserRead],
     tags=["Admin"],
-    dependencies=[Depends(dependencies.get_current_superadmin_user)],
+    dependencies=[Depends(dependencies.get_current_superadmin_user), Depends(client_cache)],
 )
 async def get_users(
     session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
@@ -95,10 +101,19 @@ async def get_users(
 @router.get(
     "/{username}",
     response_model=UserRead,
-    dependencies=[Depends(dependencies.get_current_superadmin_user)],
+    dependencies=[Depends(dependencies.get_current_superadmin_user), Depends(client_cache)],
     tags=["Admin"],
 )
+@cache(
+    key_prefix="user",
+    resource_id_name="username",
+    expiration=60,
+    local_ttl=settings.cache.LOCAL_CACHE_TTL,
+    raw_response=True,
+    namespaces=["user:{username}"],
+)
 async def get_user(
+    request: Request,
     username: str,
     session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
 ):
@@ -120,12 +135,12 @@ async def update_my_profile(
     session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
     current_user: UserRead = Depends(dependencies.get_current_active_auth_user),
 ):
-    if values.username and values.username != current_user.username:
+    if values.username and values.username != current_user["username"]:
         existing_username = await crud_users.exists(db=session, username=values.username)
         if existing_username:
             raise DuplicateValueException("Username not available")
 
-    if values.email != current_user.email:
+    if values.email != current_user["email"]:
         existing_email = await crud_users.exists(
             db=session,
             email=values.email,
@@ -144,8 +159,10 @@ async def update_my_profile(
     await crud_users.update(
         db=session,
         object=update_internal,
-        username=current_user.username,
+        username=current_user["username"],
     )
+    await invalidate_principals(current_user["id"])
+    await bump_namespaces(user_namespace(current_user["username"]))
     return {"message": "User updated"}
 
 
@@ -153,12 +170,16 @@ async def update_my_profile(
 async def delete_my_profile(
     session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
     current_user: UserRead = Depends(dependencies.get_current_active_auth_user),
+    payload: dict = Depends(validation.get_current_token_payload),
+    refresh_token: str | None = Cookie(alias="refresh_token", default=None),
 ):
     await crud_users.delete(
         db=session,
-        username=current_user.username,
+        username=current_user["username"],
     )
-    # todo: add token to  blacklist
+    await revoke_tokens(payload, refresh_token)
+    await invalidate_principals(current_user["id"])
+    await bump_namespaces(user_namespace(current_user["username"]))
     return {
         "message": "User deleted",
     }
@@ -174,8 +195,9 @@ async def delete_user(
     username: str,
     session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
 ):
-    user = await crud_users.exists(
+    user = await crud_users.get(
         db=session,
+        schema_to_select=UserRead,
         username=username,
     )
     if not user:
@@ -185,6 +207,8 @@ async def delete_user(
         db=session,
         username=username,
     )
+    await invalidate_principals(user["id"])
+    await bump_namespaces(user_namespace(username))
 
     # todo: add token to  blacklist
     return {
@@ -194,7 +218,7 @@ async def delete_user(
 
 @router.get(
     "/{username}/rate_limits",
-    dependencies=[Depends(dependencies.get_current_superadmin_user)],
+    dependencies=[Depends(dependencies.get_current_superadmin_user), Depends(client_cache)],
     tags=["Admin"],
 )
 async def get_user_rate_limits(
@@ -232,7 +256,7 @@ async def get_user_rate_limits(
 
 @router.get(
     "/{username}/tier",
-    dependencies=[Depends(dependencies.get_current_superadmin_user)],
+    dependencies=[Depends(dependencies.get_current_superadmin_user), Depends(client_cache)],
     tags=["Admin"],
 )
 async def get_user_tier(
@@ -295,6 +319,8 @@ async def update_user_tier(
         object=values,
         username=username,
     )
+    await invalidate_principals(db_user["id"])
+    await bump_namespaces(user_namespace(username))
     return {
         "message": f"User {db_user['name']} Tier updated",
     }
@@ -4,6 +4,7 @@ from app.schemas.user import UserBase
 from fastapi import (
     Depends,
     HTTPException,
+    Request,
     status,
 )
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -16,6 +17,7 @@ from .helpers import (
 from .validation import (
     get_current_token_payload,
     # get_refresh_token_payload,
+    get_request_user,
     get_user_by_token_sub,
     validate_token_type,
 )
@@ -29,11 +31,15 @@ class UserGetterFromToken:
 
     async def __call__(
         self,
+        request: Request,
         payload: dict = Depends(get_current_token_payload),
         session: AsyncSession = Depends(db_helper.session_getter),
     ):
-        validate_token_type(payload, self.token_type)
-        user = await get_user_by_token_sub(session, payload)
+        if self.token_type == ACCESS_TOKEN_TYPE:
+            user = await get_request_user(request, session, payload)
+        else:
+            validate_token_type(payload, self.token_type)
+            user = await get_user_by_token_sub(session, payload)
         # if not user.is_active:
         if not user:
             raise HTTPException(
@@ -87,12 +93,13 @@ async def get_current_superadmin_user(
 
 
 async def get_optional_user(
+    request: Request,
     payload: dict = Depends(get_current_token_payload),
     session: AsyncSession = Depends(db_helper.session_getter),
 ) -> dict | None:
     try:
-        validate_token_type(payload, ACCESS_TOKEN_TYPE)
-        user = await get_user_by_token_sub(
+        user = await get_request_user(
+            request=request,
             session=session,
             payload=payload,
         )
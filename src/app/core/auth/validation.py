@@ -1,10 +1,10 @@
-from app.crud.crud_token_blacklist import crud_token_blacklist
-from app.crud.crud_users import crud_users
+from app.crud.crud_users import crud_users, get_user_principal
 from app.schemas.user import UserBase
 from fastapi import (
     Cookie,
     Depends,
     HTTPException,
+    Request,
     status,
 )
 from fastapi.security import OAuth2PasswordBearer
@@ -14,7 +14,10 @@ from jwt import InvalidTokenError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..utils import auth_utils
+from ..utils.cache_warmup import record_hot_key
+from ..utils.token_blacklist import is_token_revoked
 from .helpers import (
+    ACCESS_TOKEN_TYPE,
     TOKEN_TYPE_FIELD,
 )
 
@@ -36,6 +39,7 @@ def validate_token_type(
 
 
 def get_current_token_payload(
+    request: Request,
     access_token: str = Depends(oauth2_scheme),
 ) -> dict:
     try:
@@ -45,6 +49,11 @@ def get_current_token_payload(
         else:
             token = access_token
 
+        # Подпись этого токена уже проверил RateLimitMiddleware.
+        verified = getattr(request.state, "token_payload", None)
+        if verified is not None and verified[0] == token:
+            return verified[1]
+
         payload = auth_utils.decode_jwt(
             token=token,
         )
@@ -84,13 +93,8 @@ async def get_refresh_token_payload(
 
 async def get_user_by_token_sub(session: AsyncSession, payload: dict) -> UserBase:
     user_id: str | None = payload.get("sub")
-    # todo: check token blacklist
-    jti = payload.get("jti")
-    is_blacklisted = await crud_token_blacklist.exists(
-        db=session,
-        jti=jti,
-    )
-    if is_blacklisted:
+    # Отозванные токены хранятся в Redis, большинство проверок отвечает фильтр Блума воркера.
+    if await is_token_revoked(payload.get("jti")):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token (blacklisted)",
@@ -108,11 +112,9 @@ async def get_user_by_token_sub(session: AsyncSession, payload: dict) -> UserBas
             detail="Invalid token format",
         )
 
-    user = await crud_users.get(
-        db=session,
-        id=user_id_int,
-        is_deleted=False,
-    )
+    # Пользователь берется из кэша; база данных запрашивается только при промахе.
+    record_hot_key("principal", user_id_int)
+    user = await get_user_principal(session, user_id_int)
     if user:
         return user
     raise HTTPException(
@@ -121,6 +123,26 @@ async def get_user_by_token_sub(session: AsyncSession, payload: dict) -> UserBas
     )
 
 
+async def get_request_user(request: Request, session: AsyncSession, payload: dict) -> UserBase:
+    """Пользователь access-токена запроса, общий для всех зависимостей аутентификации.
+
+    Тип токена, черный список и пользователь проверяются один раз за запрос: результат,
+    в том числе ошибка 401, сохраняется в `request.state.principal`.
+    """
+    principal = getattr(request.state, "principal", None)
+    if principal is None:
+        try:
+            validate_token_type(payload, ACCESS_TOKEN_TYPE)
+            principal = await get_user_by_token_sub(session, payload)
+        except HTTPException as e:
+            principal = e
+        request.state.principal = principal
+
+    if isinstance(principal, HTTPException):
+        raise principal
+    return principal
+
+
 async def authenticate_user(
     username_or_email: str,
     password: str,
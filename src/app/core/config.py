@@ -35,6 +35,7 @@ class ApiV1Prefix(BaseSettings):
     tier_prefix: str = "/tier"
     post_prefix: str = "/post"
     task_prefix: str = "/task"
+    cache_prefix: str = "/cache"
 
 
 class ApiPrefix(BaseSettings):
@@ -73,6 +74,13 @@ class CryptSettings(BaseSettings):
     REFRESH_TOKEN_HTTPONLY: bool = config("REFRESH_TOKEN_HTTPONLY", default=True)
     REFRESH_TOKEN_COOKIE_SECURE: bool = config("REFRESH_TOKEN_COOKIE_SECURE", default=True)
     REFRESH_TOKEN_COOKIE_SAMESITE: str = config("REFRESH_TOKEN_COOKIE_SAMESITE", default="Lax")
+    TOKEN_BLACKLIST_CHANNEL: str = config("TOKEN_BLACKLIST_CHANNEL", default="auth:revoked")
+    TOKEN_BLACKLIST_BLOOM_CAPACITY: int = config("TOKEN_BLACKLIST_BLOOM_CAPACITY", default=100000)
+    TOKEN_BLACKLIST_BLOOM_ERROR_RATE: float = config("TOKEN_BLACKLIST_BLOOM_ERROR_RATE", default=0.001)
+    TOKEN_BLACKLIST_REBUILD_INTERVAL: float = config("TOKEN_BLACKLIST_REBUILD_INTERVAL", default=3600.0)
+    PASSWORD_HASHING_WORKERS: int = config("PASSWORD_HASHING_WORKERS", default=2)
+    PASSWORD_HASHING_MAX_QUEUE: int = config("PASSWORD_HASHING_MAX_QUEUE", default=32)
+    JWT_CACHE_MAX_SIZE: int = config("JWT_CACHE_MAX_SIZE", default=4096)
 
 
 class DatabaseSettings(BaseSettings):
@@ -176,6 +184,22 @@ class RedisCacheSettings(RedisClientSettings):
     #     return f"redis://{self.REDIS_CACHE_HOST}:{self.REDIS_CACHE_PORT}"
 
 
+class CacheSettings(BaseSettings):
+    LOCAL_CACHE_MAX_SIZE: int = config("LOCAL_CACHE_MAX_SIZE", default=1024)
+    LOCAL_CACHE_TTL: int = config("LOCAL_CACHE_TTL", default=5)
+    CACHE_INVALIDATION_CHANNEL: str = config("CACHE_INVALIDATION_CHANNEL", default="cache:invalidate")
+    CACHE_COMPRESSION_MIN_SIZE: int = config("CACHE_COMPRESSION_MIN_SIZE", default=1024)
+    CACHE_NAMESPACE_MEMO_TTL: float = config("CACHE_NAMESPACE_MEMO_TTL", default=1.0)
+    CACHE_METRICS_FLUSH_INTERVAL: float = config("CACHE_METRICS_FLUSH_INTERVAL", default=10.0)
+    CACHE_HOT_KEYS_MAX: int = config("CACHE_HOT_KEYS_MAX", default=1000)
+    CACHE_HOT_KEYS_FLUSH_INTERVAL: float = config("CACHE_HOT_KEYS_FLUSH_INTERVAL", default=10.0)
+    CACHE_WARMUP_BATCH_SIZE: int = config("CACHE_WARMUP_BATCH_SIZE", default=20)
+    CACHE_WARMUP_BATCH_DELAY: float = config("CACHE_WARMUP_BATCH_DELAY", default=0.5)
+    CACHE_WARMUP_ON_STARTUP: bool = config("CACHE_WARMUP_ON_STARTUP", default=False)
+    PRINCIPAL_CACHE_TTL: int = config("PRINCIPAL_CACHE_TTL", default=60)
+    PRINCIPAL_CACHE_LOCAL_TTL: float = config("PRINCIPAL_CACHE_LOCAL_TTL", default=5.0)
+
+
 class RedisQueueSettings(RedisClientSettings):
     pass
     # REDIS_QUEUE_HOST: str = config("REDIS_QUEUE_HOST", default="localhost")
@@ -203,6 +227,18 @@ class ClientSideCacheSettings(BaseSettings):
 class DefaultRateLimitSettings(BaseSettings):
     DEFAULT_LIMIT: int = config("DEFAULT_RATE_LIMIT_LIMIT", default=1)
     DEFAULT_PERIOD: int = config("DEFAULT_RATE_LIMIT_PERIOD", default=60)
+    DEFAULT_ALGORITHM: str = config("DEFAULT_RATE_LIMIT_ALGORITHM", default="fixed_window")
+    RATE_LIMIT_LOCAL_SYNC_INTERVAL: float = config("RATE_LIMIT_LOCAL_SYNC_INTERVAL", default=0.1)
+    RATE_LIMIT_REDIS_TIMEOUT: float = config("RATE_LIMIT_REDIS_TIMEOUT", default=0.05)
+    RATE_LIMIT_BREAKER_FAILURE_THRESHOLD: int = config("RATE_LIMIT_BREAKER_FAILURE_THRESHOLD", default=5)
+    RATE_LIMIT_BREAKER_RECOVERY_TIMEOUT: float = config("RATE_LIMIT_BREAKER_RECOVERY_TIMEOUT", default=5.0)
+    RATE_LIMIT_FAILURE_POLICY: str = config("RATE_LIMIT_FAILURE_POLICY", default="local")
+    RATE_LIMIT_FALLBACK_MAX_KEYS: int = config("RATE_LIMIT_FALLBACK_MAX_KEYS", default=10000)
+    RATE_LIMIT_STORAGE: str = config("RATE_LIMIT_STORAGE", default="keys")
+    RATE_LIMIT_CONCURRENCY_LEASE_TIMEOUT: float = config("RATE_LIMIT_CONCURRENCY_LEASE_TIMEOUT", default=60.0)
+    RATE_LIMIT_CONCURRENCY_MAX_WAIT: float = config("RATE_LIMIT_CONCURRENCY_MAX_WAIT", default=0.0)
+    RATE_LIMIT_RULES_CHANNEL: str = config("RATE_LIMIT_RULES_CHANNEL", default="ratelimit:rules")
+    RATE_LIMIT_RULES_CHECK_INTERVAL: float = config("RATE_LIMIT_RULES_CHECK_INTERVAL", default=30.0)
 
 
 class FirstUserSettings(BaseSettings):
@@ -245,6 +281,7 @@ class Settings:
     test: TestSettings = TestSettings()
     redis_client: RedisClientSettings = RedisClientSettings()
     redis_cache: RedisCacheSettings = RedisCacheSettings()
+    cache: CacheSettings = CacheSettings()
     redis_queue: RedisQueueSettings = RedisQueueSettings()
     redis_rate_limiter: RedisRateLimiterSettings = RedisRateLimiterSettings()
     rate_limit: DefaultRateLimitSettings = DefaultRateLimitSettings()
@@ -0,0 +1,16 @@
+class CacheIdentificationInferenceError(Exception):
+    def __init__(self, message: str = "Could not infer id for resource being cached.") -> None:
+        self.message = message
+        super().__init__(self.message)
+
+
+class InvalidRequestError(Exception):
+    def __init__(self, message: str = "Type of request not supported.") -> None:
+        self.message = message
+        super().__init__(self.message)
+
+
+class MissingClientError(Exception):
+    def __init__(self, message: str = "Client is None.") -> None:
+        self.message = message
+        super().__init__(self.message)
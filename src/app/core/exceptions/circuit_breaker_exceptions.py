@@ -0,0 +1,4 @@
+class CircuitOpenError(Exception):
+    def __init__(self, message: str = "Circuit breaker is open.") -> None:
+        self.message = message
+        super().__init__(self.message)
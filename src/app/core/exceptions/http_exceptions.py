@@ -9,3 +9,9 @@ from fastcrud.exceptions.http_exceptions import (
     DuplicateValueException,
     RateLimitException,
 )
+from fastapi import status
+
+
+class ServiceUnavailableException(CustomException):
+    def __init__(self, detail: str | None = None):
+        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail)
@@ -0,0 +1,7 @@
+__all__ = (
+    "ClientCacheMiddleware",
+    "RateLimitMiddleware",
+)
+
+from .client_cache import ClientCacheMiddleware
+from .rate_limit import RateLimitMiddleware
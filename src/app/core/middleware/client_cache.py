@@ -0,0 +1,95 @@
+from collections.abc import Callable
+from typing import Any
+
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..utils.etag import etag_matches, make_etag
+
+# Заголовки, описывающие тело ответа: в ответе 304 тела нет.
+_BODY_HEADERS = ("content-length", "content-type", "content-encoding")
+
+
+class ClientCacheMiddleware:
+    """Условные запросы для GET: ETag, ответ 304 Not Modified на совпадающий If-None-Match и Cache-Control.
+
+    Обрабатываются только маршруты, объявившие зависимость `dependency` (обычно `client_cache`): ответы
+    о ходе задач и метрики клиент не должен кэшировать. Если ответ уже содержит ETag (например, от декоратора
+    `cache` с `raw_response`), он используется как есть, иначе вычисляется по телу ответа. Ответы с кодом,
+    отличным от 200 и 304, и ответы, сами задавшие Cache-Control, не изменяются.
+    """
+
+    def __init__(self, app: ASGIApp, dependency: Callable[..., Any], max_age: int = 60) -> None:
+        self.app = app
+        self.dependency = dependency
+        self.cache_control = f"private, max-age={max_age}"
+        # Маршруты не хешируются (у них определен __eq__), поэтому ключ - id маршрута.
+        self._cacheable_routes: dict[int, bool] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        start_message: Message | None = None
+        passthrough = False
+        body = bytearray()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, passthrough
+
+            if message["type"] == "http.response.start":
+                # К началу ответа маршрутизатор уже записал найденный маршрут в scope.
+                headers = MutableHeaders(scope=message)
+                cacheable = self._is_cacheable(scope.get("route")) and "cache-control" not in headers
+                if cacheable and message["status"] == 304:
+                    headers["cache-control"] = self.cache_control
+                if not cacheable or message["status"] != 200:
+                    passthrough = True
+                    await send(message)
+                    return
+                start_message = message
+                return
+
+            if passthrough or start_message is None:
+                await send(message)
+                return
+
+            body.extend(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            await self._send_response(start_message, bytes(body), if_none_match, send)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _send_response(self, start_message: Message, body: bytes, if_none_match: str | None, send: Send) -> None:
+        headers = MutableHeaders(scope=start_message)
+        etag = headers.get("etag")
+        if etag is None:
+            etag = make_etag(body)
+            headers["etag"] = etag
+        headers["cache-control"] = self.cache_control
+
+        if etag_matches(if_none_match, etag):
+            for name in _BODY_HEADERS:
+                del headers[name]
+            start_message["status"] = 304
+            body = b""
+
+        await send(start_message)
+        await send({"type": "http.response.body", "body": body})
+
+    def _is_cacheable(self, route: Any) -> bool:
+        if route is None:
+            return False
+
+        cacheable = self._cacheable_routes.get(id(route))
+        if cacheable is None:
+            cacheable = isinstance(route, APIRoute) and any(
+                depends.dependency is self.dependency for depends in route.dependencies
+            )
+            self._cacheable_routes[id(route)] = cacheable
+        return cacheable
@@ -0,0 +1,133 @@
+from collections.abc import Callable
+from typing import Any
+
+from app.crud.crud_users import get_user_principal
+from app.schemas.rate_limit import sanitize_path
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from jwt import InvalidTokenError
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..auth.helpers import ACCESS_TOKEN_TYPE, TOKEN_TYPE_FIELD
+from ..db.db_helper import db_helper
+from ..utils import auth_utils
+from ..utils.concurrency_limit import acquire_slot, release_slot
+from ..utils.rate_limit import check_rate_limit, get_request_cost
+from ..utils.rate_limit_rules import resolve_limit, resolve_max_concurrency
+
+
+class RateLimitMiddleware:
+    """Проверяет лимит запросов до маршрутизации и аутентификации.
+
+    Ограничиваются только маршруты, объявившие зависимость `dependency` (обычно `rate_limiter`),
+    поэтому набор ограниченных маршрутов задается так же, как и без middleware. Пользователь
+    определяется по claim `sub` access-токена из заголовка Authorization (подпись и срок действия
+    проверяются, черный список - нет), иначе по IP. Тариф пользователя берется из кэша пользователей
+    (`principal_cache`), а не из токена: смена тарифа сбрасывает кэш и действует сразу. Обычно
+    пользователь уже есть в памяти воркера, и база данных запрашивается только при промахе кэша.
+    Проверенный токен сохраняется в `request.state.token_payload`, и зависимости аутентификации
+    повторно его не декодируют.
+    Запрос сверх лимита получает 429, не дойдя до приложения. Если у тарифа задан `max_concurrency`,
+    запрос также занимает слот одновременных запросов пользователя до конца ответа; без свободного
+    слота он получает 429. Для прошедших запросов результат проверки сохраняется в
+    `request.state.rate_limit`, и зависимость повторно лимит не считает.
+    """
+
+    def __init__(self, app: ASGIApp, dependency: Callable[..., Any]) -> None:
+        self.app = app
+        self.dependency = dependency
+        # Маршруты не хешируются (у них определен __eq__), поэтому ключ - id маршрута.
+        self._limited_routes: dict[int, bool] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = self._match_route(scope)
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        path = sanitize_path(route.path_format)
+        user_id, tier_id = await _get_principal(scope, scope.setdefault("state", {}))
+        limit, period, algorithm, sync_hits, cost, cost_per_kb = await resolve_limit(path, user_id=user_id, tier_id=tier_id)
+        client = scope.get("client")
+        result = await check_rate_limit(
+            user_id=user_id if user_id is not None else (client[0] if client else "unknown"),
+            path=path,
+            limit=limit,
+            period=period,
+            algorithm=algorithm,
+            sync_hits=sync_hits,
+            cost=get_request_cost(cost, cost_per_kb, Headers(scope=scope).get("content-length")),
+        )
+        if result.limited:
+            response = JSONResponse({"detail": "Rate limit exceeded."}, status_code=429, headers=result.headers)
+            await response(scope, receive, send)
+            return
+
+        token = None
+        max_concurrency = await resolve_max_concurrency(user_id, tier_id)
+        if max_concurrency:
+            token = await acquire_slot(user_id, max_concurrency)  # type: ignore
+            if token is None:
+                response = JSONResponse(
+                    {"detail": "Too many concurrent requests."},
+                    status_code=429,
+                    headers={"Retry-After": "1"},
+                )
+                await response(scope, receive, send)
+                return
+
+        scope.setdefault("state", {})["rate_limit"] = result
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for name, value in result.headers.items():
+                    headers[name] = value
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if token is not None:
+                await release_slot(user_id, token)  # type: ignore
+
+    def _match_route(self, scope: Scope) -> APIRoute | None:
+        """Находит маршрут запроса, если он ограничен лимитом. Маршрутизация приложения при этом не выполняется."""
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route if self._is_limited(route) else None
+        return None
+
+    def _is_limited(self, route: Any) -> bool:
+        limited = self._limited_routes.get(id(route))
+        if limited is None:
+            limited = isinstance(route, APIRoute) and any(depends.dependency is self.dependency for depends in route.dependencies)
+            self._limited_routes[id(route)] = limited
+        return limited
+
+
+async def _get_principal(scope: Scope, state: dict[str, Any]) -> tuple[int | None, int | None]:
+    scheme, _, token = Headers(scope=scope).get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None, None
+
+    try:
+        payload = auth_utils.decode_jwt(token=token)
+        state["token_payload"] = (token, payload)
+        if payload.get(TOKEN_TYPE_FIELD) != ACCESS_TOKEN_TYPE:
+            return None, None
+        user_id = int(payload["sub"])
+    except (InvalidTokenError, KeyError, ValueError):
+        return None, None
+
+    # Тот же пользователь затем достается из кэша зависимостями аутентификации.
+    async with db_helper.session_factory() as session:
+        user = await get_user_principal(session, user_id)
+    return user_id, user["tier_id"] if user else None
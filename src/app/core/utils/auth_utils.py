@@ -1,11 +1,42 @@
+import asyncio
+import hashlib
+import os
+import time
 import uuid
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime, timedelta
 from pathlib import Path
+from typing import TypeVar
 
 import bcrypt
 import jwt
 
 from ..config import settings
+from ..exceptions.http_exceptions import ServiceUnavailableException
+from ..logger import logging
+from .local_cache import LocalCache
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+PASSWORD_HASHING_WORKERS = settings.crypt.PASSWORD_HASHING_WORKERS
+PASSWORD_HASHING_MAX_QUEUE = settings.crypt.PASSWORD_HASHING_MAX_QUEUE
+
+# bcrypt занимает 100-300 мс на вызов и отпускает GIL, поэтому выполняется в отдельных потоках,
+# а не в цикле событий: вход пользователей не задерживает остальные запросы воркера.
+_password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASHING_WORKERS, thread_name_prefix="password-hashing")
+_password_tasks = 0
+_password_rejected = 0
+
+PUBLIC_KEY = settings.crypt.PUBLIC_KEY.read_text()
+JWT_CACHE_MAX_SIZE = settings.crypt.JWT_CACHE_MAX_SIZE
+
+# Проверенные токены воркера: sha256 токена -> claims. Клиент повторяет один access-токен до его истечения,
+# поэтому проверка подписи RS256 выполняется один раз на токен. Запись живет до `exp`, и истекший токен
+# из кэша не вернется. Отзыв токена проверяется отдельно (`token_blacklist`) и от кэша не зависит.
+_verified_tokens = LocalCache(max_size=JWT_CACHE_MAX_SIZE, ttl=settings.crypt.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
 
 
 def encode_jwt(
@@ -33,22 +64,36 @@ def encode_jwt(
 
 def decode_jwt(
     token: str | bytes,
-    public_key: Path = settings.crypt.PUBLIC_KEY.read_text(),
+    public_key: Path = PUBLIC_KEY,  # type: ignore
     algorithm: str = settings.crypt.ALGORITHM,
 ) -> dict:
+    # Кэшируются только токены, проверенные ключом и алгоритмом из настроек.
+    cacheable = JWT_CACHE_MAX_SIZE > 0 and public_key is PUBLIC_KEY and algorithm == settings.crypt.ALGORITHM
+    if cacheable:
+        cache_key = hashlib.sha256(token if isinstance(token, bytes) else token.encode()).hexdigest()
+        claims = _verified_tokens.get(cache_key)
+        if claims is not None:
+            return dict(claims)
+
     decoded = jwt.decode(token, public_key, algorithms=algorithm)
+    if cacheable:
+        ttl = decoded.get("exp", 0) - time.time()
+        if ttl > 0:
+            _verified_tokens.set(cache_key, decoded, ttl=ttl)
+        return dict(decoded)
     return decoded
 
 
 def hash_password(
     password: str,
 ) -> bytes:
+    """Хеширует пароль в текущем потоке. В обработчиках запросов используйте `hash_password_async`."""
     salt = bcrypt.gensalt()
     pwd_bytes: bytes = password.encode()
     return bcrypt.hashpw(pwd_bytes, salt)
 
 
-async def verify_password(
+def check_password(
     password: str,
     hashed_password: str | bytes,
 ) -> bool:
@@ -60,3 +105,68 @@ async def verify_password(
         password=pwd_bytes,
         hashed_password=hashed_password,
     )
+
+
+async def hash_password_async(
+    password: str,
+) -> bytes:
+    return await _run_password_task(hash_password, password)
+
+
+async def verify_password(
+    password: str,
+    hashed_password: str | bytes,
+) -> bool:
+    return await _run_password_task(check_password, password, hashed_password)
+
+
+async def _run_password_task(func: Callable[..., T], *args: object) -> T:
+    """Выполняет bcrypt в пуле `PASSWORD_HASHING_WORKERS` потоков.
+
+    Если все потоки заняты и в очереди уже `PASSWORD_HASHING_MAX_QUEUE` задач, запрос сразу получает 503:
+    ожидание в длинной очереди все равно закончилось бы таймаутом клиента.
+    """
+    global _password_tasks, _password_rejected
+
+    if _password_tasks >= PASSWORD_HASHING_WORKERS + PASSWORD_HASHING_MAX_QUEUE:
+        _password_rejected += 1
+        logger.warning(f"Password hashing pool is saturated: {_password_tasks} tasks in flight, rejecting request")
+        exception = ServiceUnavailableException("Too many password checks in progress, try again later.")
+        exception.headers = {"Retry-After": "1"}
+        raise exception
+
+    _password_tasks += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_password_executor, func, *args)
+    finally:
+        _password_tasks -= 1
+
+
+def get_password_pool_stats() -> dict[str, int]:
+    """Состояние пула bcrypt текущего воркера: число потоков, выполняемые и ожидающие задачи, число отказов (503)."""
+    return {
+        "workers": PASSWORD_HASHING_WORKERS,
+        "running": min(_password_tasks, PASSWORD_HASHING_WORKERS),
+        "queued": max(_password_tasks - PASSWORD_HASHING_WORKERS, 0),
+        "rejected_total": _password_rejected,
+    }
+
+
+_PASSWORD_POOL_METRICS = {
+    "workers": ("password_hashing_workers", "gauge", "Threads in the bcrypt pool."),
+    "running": ("password_hashing_running", "gauge", "Password hashes and checks being computed."),
+    "queued": ("password_hashing_queued", "gauge", "Password hashes and checks waiting for a free thread."),
+    "rejected_total": ("password_hashing_rejected_total", "counter", "Requests rejected with 503 because the queue was full."),
+}
+
+
+def render_password_pool_prometheus() -> str:
+    """Состояние пула bcrypt в текстовом формате Prometheus.
+
+    Пул у каждого воркера свой, поэтому метрики помечены PID воркера, ответившего на запрос.
+    """
+    stats = get_password_pool_stats()
+    lines = []
+    for field, (name, kind, description) in _PASSWORD_POOL_METRICS.items():
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}", f'{name}{{pid="{os.getpid()}"}} {stats[field]}']
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,35 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+    """Фильтр Блума в памяти процесса: отвечает «точно нет» или «возможно да».
+
+    Размер битового массива и число хеш-функций подбираются под ожидаемое число элементов `capacity`
+    и допустимую долю ложноположительных ответов `error_rate`. Если элементов больше, чем `capacity`,
+    ложноположительных ответов становится больше, но ложноотрицательных не бывает никогда.
+    Удалять элементы нельзя: для этого фильтр строится заново.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hash_count = max(round(self.size / capacity * math.log(2)), 1)
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> list[int]:
+        # Двойное хеширование (Kirsch-Mitzenmacher): k позиций из двух половин одного дайджеста.
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
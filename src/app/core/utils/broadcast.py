@@ -0,0 +1,114 @@
+import asyncio
+import json
+from collections.abc import Callable
+from typing import Any
+
+from app.core.logger import logging
+
+from ..exceptions.cache_exceptions import MissingClientError
+from . import redis_client
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_DELAY = 1.0
+
+MessageHandler = Callable[[dict[str, Any]], None]
+ResetHandler = Callable[[], None]
+
+_handlers: dict[str, list[MessageHandler]] = {}
+_reset_handlers: list[ResetHandler] = []
+_listener_task: asyncio.Task | None = None
+
+
+def subscribe(channel: str, handler: MessageHandler, reset: ResetHandler | None = None) -> None:
+    """Регистрирует обработчик сообщений канала Redis pub/sub в текущем процессе.
+
+    Параметры
+    ---------
+    channel: str
+        Имя канала Redis.
+    handler: Callable[[dict[str, Any]], None]
+        Синхронный обработчик декодированного сообщения. Должен быть быстрым: он выполняется в цикле слушателя.
+    reset: Callable[[], None] | None, optional
+        Вызывается после переподключения к Redis, так как сообщения, отправленные во время разрыва, потеряны.
+        Обычно сбрасывает локальное состояние процесса целиком.
+    """
+    handlers = _handlers.setdefault(channel, [])
+    if handler not in handlers:
+        handlers.append(handler)
+    if reset is not None and reset not in _reset_handlers:
+        _reset_handlers.append(reset)
+
+
+async def publish(channel: str, message: dict[str, Any]) -> None:
+    """Публикует сообщение для всех процессов (воркеров gunicorn), подписанных на канал."""
+    if redis_client.client is None:
+        raise MissingClientError
+
+    await redis_client.client.publish(channel, json.dumps(message))
+
+
+def _dispatch(channel: str, data: dict[str, Any]) -> None:
+    for handler in _handlers.get(channel, ()):
+        try:
+            handler(data)
+        except Exception as e:
+            logger.exception(f"Error handling broadcast message on channel {channel}: {e}")
+
+
+def _reset() -> None:
+    for reset in _reset_handlers:
+        try:
+            reset()
+        except Exception as e:
+            logger.exception(f"Error resetting local state after broadcast reconnect: {e}")
+
+
+async def _listen() -> None:
+    reconnecting = False
+    while True:
+        pubsub = redis_client.client.pubsub(ignore_subscribe_messages=True)  # type: ignore
+        try:
+            await pubsub.subscribe(*_handlers)
+            if reconnecting:
+                _reset()
+                logger.info("Broadcast listener reconnected.")
+
+            async for message in pubsub.listen():
+                channel = message["channel"].decode()
+                _dispatch(channel, json.loads(message["data"]))
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Broadcast listener lost connection to Redis: {e}")
+            reconnecting = True
+            await asyncio.sleep(RECONNECT_DELAY)
+        finally:
+            await pubsub.aclose()
+
+
+async def start_listener() -> None:
+    global _listener_task
+
+    if redis_client.client is None:
+        raise MissingClientError
+
+    if not _handlers or _listener_task is not None:
+        return
+
+    _listener_task = asyncio.create_task(_listen())
+
+
+async def stop_listener() -> None:
+    global _listener_task
+
+    if _listener_task is None:
+        return
+
+    _listener_task.cancel()
+    try:
+        await _listener_task
+    except asyncio.CancelledError:
+        pass
+    _listener_task = None
@@ -0,0 +1,230 @@
+import asyncio
+import bisect
+import math
+from collections import defaultdict
+from typing import Any
+
+from app.core.config import settings
+from app.core.logger import logging
+
+from ..exceptions.cache_exceptions import MissingClientError
+from . import redis_client
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY = "cache:metrics"
+FLUSH_INTERVAL = settings.cache.CACHE_METRICS_FLUSH_INTERVAL
+
+# Разделитель частей имени поля в хеше METRICS_KEY: метрика, key_prefix, маршрут, суффикс.
+_SEPARATOR = "\t"
+
+COUNTERS = {
+    "cache_hits_total": "Cache hits, including local tier hits.",
+    "cache_local_hits_total": "Cache hits served from the in-process LRU tier.",
+    "cache_stale_hits_total": "Hits that scheduled a background refresh (stale or early refresh).",
+    "cache_misses_total": "Requests that found no cached entry.",
+    "cache_namespace_bumps_total": "Namespace generations bumped; each one invalidates every entry of the namespace.",
+}
+
+HISTOGRAMS = {
+    "cache_get_seconds": (
+        "Latency of reading an entry from Redis.",
+        (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+    ),
+    "cache_set_seconds": (
+        "Latency of writing an entry (and its tags) to Redis.",
+        (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+    ),
+    "cache_payload_bytes": (
+        "Size of the serialized entry written to Redis.",
+        (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+    ),
+    "cache_invalidated_keys": (
+        "Number of keys removed by one invalidation.",
+        (0, 1, 5, 10, 50, 100, 500, 1000, 5000),
+    ),
+}
+
+
+class CacheMetrics:
+    """Счетчики и гистограммы кэша в памяти воркера с метками (key_prefix, route).
+
+    Запись метрики не обращается к Redis: накопленные приращения периодически сбрасываются
+    в общий хеш `METRICS_KEY`, поэтому отчет суммирует все воркеры gunicorn.
+    """
+
+    def __init__(self) -> None:
+        self._values: defaultdict[str, float] = defaultdict(float)
+
+    def inc(self, name: str, key_prefix: str, route: str, value: float = 1) -> None:
+        self._values[_field(name, key_prefix, route)] += value
+
+    def observe(self, name: str, key_prefix: str, route: str, value: float) -> None:
+        buckets = HISTOGRAMS[name][1]
+        index = bisect.bisect_left(buckets, value)
+        le = str(buckets[index]) if index < len(buckets) else "+Inf"
+        self._values[_field(name, key_prefix, route, f"bucket:{le}")] += 1
+        self._values[_field(name, key_prefix, route, "sum")] += value
+        self._values[_field(name, key_prefix, route, "count")] += 1
+
+    def drain(self) -> dict[str, float]:
+        """Возвращает накопленные приращения и обнуляет их."""
+        values, self._values = self._values, defaultdict(float)
+        return dict(values)
+
+    def merge(self, values: dict[str, float]) -> None:
+        for field, value in values.items():
+            self._values[field] += value
+
+
+def _field(name: str, key_prefix: str, route: str, suffix: str = "") -> str:
+    return _SEPARATOR.join((name, key_prefix, route, suffix))
+
+
+cache_metrics = CacheMetrics()
+
+
+async def flush() -> None:
+    if redis_client.client is None:
+        raise MissingClientError
+
+    values = cache_metrics.drain()
+    if not values:
+        return
+
+    try:
+        async with redis_client.client.pipeline(transaction=False) as pipe:
+            for field, value in values.items():
+                pipe.hincrbyfloat(METRICS_KEY, field, value)
+            await pipe.execute()
+    except Exception:
+        # Возвращаем приращения, чтобы не потерять их до следующей попытки.
+        cache_metrics.merge(values)
+        raise
+
+
+async def read() -> dict[str, float]:
+    """Сбрасывает метрики текущего воркера и возвращает суммарные значения всех воркеров."""
+    if redis_client.client is None:
+        raise MissingClientError
+
+    await flush()
+    raw = await redis_client.client.hgetall(METRICS_KEY)
+    return {field.decode(): float(value) for field, value in raw.items()}
+
+
+async def reset() -> None:
+    if redis_client.client is None:
+        raise MissingClientError
+
+    cache_metrics.drain()
+    await redis_client.client.delete(METRICS_KEY)
+
+
+def summarize(values: dict[str, float]) -> list[dict[str, Any]]:
+    """Сводка по каждой паре (key_prefix, route): попадания, промахи, доля попаданий, средние задержки и размеры."""
+    groups: defaultdict[tuple[str, str], dict[str, float]] = defaultdict(dict)
+    for field, value in values.items():
+        name, key_prefix, route, suffix = field.split(_SEPARATOR)
+        if suffix in ("", "sum", "count"):
+            groups[(key_prefix, route)][f"{name}:{suffix}" if suffix else name] = value
+
+    summary = []
+    for (key_prefix, route), group in sorted(groups.items()):
+        hits = group.get("cache_hits_total", 0)
+        misses = group.get("cache_misses_total", 0)
+        item: dict[str, Any] = {
+            "key_prefix": key_prefix,
+            "route": route,
+            "hits": int(hits),
+            "local_hits": int(group.get("cache_local_hits_total", 0)),
+            "stale_hits": int(group.get("cache_stale_hits_total", 0)),
+            "misses": int(misses),
+            "hit_ratio": hits / (hits + misses) if hits + misses else None,
+            "namespace_bumps": int(group.get("cache_namespace_bumps_total", 0)),
+        }
+        for name in HISTOGRAMS:
+            count = group.get(f"{name}:count", 0)
+            item[f"{name}_avg"] = group.get(f"{name}:sum", 0) / count if count else None
+        summary.append(item)
+    return summary
+
+
+def render_prometheus(values: dict[str, float]) -> str:
+    """Форматирует метрики в текстовом формате Prometheus (гистограммы с накопительными бакетами)."""
+    series: defaultdict[str, list[tuple[str, str, str, float]]] = defaultdict(list)
+    for field, value in values.items():
+        name, key_prefix, route, suffix = field.split(_SEPARATOR)
+        series[name].append((key_prefix, route, suffix, value))
+
+    lines = []
+    for name, description in COUNTERS.items():
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} counter"]
+        for key_prefix, route, _, value in sorted(series.get(name, ())):
+            lines.append(f"{name}{{{_labels(key_prefix, route)}}} {_number(value)}")
+
+    for name, (description, buckets) in HISTOGRAMS.items():
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+        groups: defaultdict[tuple[str, str], dict[str, float]] = defaultdict(dict)
+        for key_prefix, route, suffix, value in series.get(name, ()):
+            groups[(key_prefix, route)][suffix] = value
+
+        for (key_prefix, route), group in sorted(groups.items()):
+            labels = _labels(key_prefix, route)
+            cumulative = 0.0
+            for le in [*map(str, buckets), "+Inf"]:
+                cumulative += group.get(f"bucket:{le}", 0)
+                lines.append(f'{name}_bucket{{{labels},le="{le}"}} {_number(cumulative)}')
+            lines.append(f"{name}_sum{{{labels}}} {_number(group.get('sum', 0))}")
+            lines.append(f"{name}_count{{{labels}}} {_number(group.get('count', 0))}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _labels(key_prefix: str, route: str) -> str:
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return f'key_prefix="{escape(key_prefix)}",route="{escape(route)}"'
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if math.isfinite(value) and value.is_integer() else repr(value)
+
+
+_flush_task: asyncio.Task | None = None
+
+
+async def _flush_periodically() -> None:
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL)
+        try:
+            await flush()
+        except Exception as e:
+            logger.error(f"Failed to flush cache metrics: {e}")
+
+
+async def start_flusher() -> None:
+    global _flush_task
+
+    if _flush_task is None:
+        _flush_task = asyncio.create_task(_flush_periodically())
+
+
+async def stop_flusher() -> None:
+    global _flush_task
+
+    if _flush_task is None:
+        return
+
+    _flush_task.cancel()
+    try:
+        await _flush_task
+    except asyncio.CancelledError:
+        pass
+    _flush_task = None
+
+    try:
+        await flush()
+    except Exception as e:
+        logger.error(f"Failed to flush cache metrics on shutdown: {e}")
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from app.core.config import settings
+from app.core.logger import logging
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db.db_helper import db_helper
+from ..exceptions.cache_exceptions import MissingClientError
+from . import redis_client
+
+logger = logging.getLogger(__name__)
+
+HOT_KEYS_KEY = "cache:hot"
+PROGRESS_KEY = "cache:warmup:progress"
+WARMUP_JOB_ID = "cache-warmup"
+
+HOT_KEYS_MAX = settings.cache.CACHE_HOT_KEYS_MAX
+FLUSH_INTERVAL = settings.cache.CACHE_HOT_KEYS_FLUSH_INTERVAL
+BATCH_SIZE = settings.cache.CACHE_WARMUP_BATCH_SIZE
+BATCH_DELAY = settings.cache.CACHE_WARMUP_BATCH_DELAY
+
+Warmer = Callable[..., Awaitable[Any]]
+
+_warmers: dict[str, Warmer] = {}
+_hot_keys: Counter[str] = Counter()
+
+
+def warmer(name: str) -> Callable[[Warmer], Warmer]:
+    """Регистрирует функцию, заполняющую кэш, под именем, на которое ссылаются горячие ключи.
+
+    Функция вызывается как `func(session, *args)` с аргументами, переданными в `record_hot_key`.
+
+    Пример
+    ------
+    >>> @warmer("user_posts")
+    ... async def get_user_posts_page(session, user_id, page, items_per_page): ...
+    """
+
+    def wrapper(func: Warmer) -> Warmer:
+        _warmers[name] = func
+        return func
+
+    return wrapper
+
+
+def record_hot_key(name: str, *args: Any) -> None:
+    """Учитывает обращение к записи кэша. Счетчики копятся в воркере и периодически сбрасываются в Redis."""
+    _hot_keys[json.dumps([name, args])] += 1
+
+
+async def flush_hot_keys() -> None:
+    if redis_client.client is None:
+        raise MissingClientError
+
+    if not _hot_keys:
+        return
+
+    hot_keys = dict(_hot_keys)
+    _hot_keys.clear()
+    async with redis_client.client.pipeline(transaction=False) as pipe:
+        for member, count in hot_keys.items():
+            pipe.zincrby(HOT_KEYS_KEY, count, member)
+        # Оставляем только самые популярные ключи.
+        pipe.zremrangebyrank(HOT_KEYS_KEY, 0, -HOT_KEYS_MAX - 1)
+        await pipe.execute()
+
+
+async def get_progress() -> dict[str, str]:
+    if redis_client.client is None:
+        raise MissingClientError
+
+    progress = await redis_client.client.hgetall(PROGRESS_KEY)
+    return {field.decode(): value.decode() for field, value in progress.items()}
+
+
+async def warm_up(limit: int | None = None) -> dict[str, str]:
+    """Заполняет кэш для самых популярных записей пачками по `CACHE_WARMUP_BATCH_SIZE`.
+
+    Между пачками делается пауза `CACHE_WARMUP_BATCH_DELAY` секунд, чтобы не перегружать базу данных
+    во время выкатки. Ход выполнения записывается в хеш `PROGRESS_KEY`.
+
+    Параметры
+    ----------
+    limit: int | None, optional
+        Сколько самых популярных ключей прогреть. По умолчанию все записанные (не больше `CACHE_HOT_KEYS_MAX`).
+
+    Возвращает
+    ----------
+    Dict[str, str]
+        Итоговое состояние прогрева.
+    """
+    if redis_client.client is None:
+        raise MissingClientError
+
+    members = await redis_client.client.zrevrange(HOT_KEYS_KEY, 0, (limit or HOT_KEYS_MAX) - 1)
+    progress: dict[str, Any] = {"status": "running", "total": len(members), "done": 0, "failed": 0, "started_at": time.time()}
+    await redis_client.client.delete(PROGRESS_KEY)
+    await redis_client.client.hset(PROGRESS_KEY, mapping=progress)
+
+    try:
+        for start in range(0, len(members), BATCH_SIZE):
+            batch = [json.loads(member) for member in members[start : start + BATCH_SIZE]]
+            async with db_helper.session_factory() as session:
+                for name, args in batch:
+                    if await _warm(session, name, args):
+                        progress["done"] += 1
+                    else:
+                        progress["failed"] += 1
+
+            await redis_client.client.hset(PROGRESS_KEY, mapping={"done": progress["done"], "failed": progress["failed"]})
+            if start + BATCH_SIZE < len(members):
+                await asyncio.sleep(BATCH_DELAY)
+    except BaseException:
+        await redis_client.client.hset(PROGRESS_KEY, mapping={"status": "failed", "finished_at": time.time()})
+        raise
+
+    progress.update(status="finished", finished_at=time.time())
+    await redis_client.client.hset(PROGRESS_KEY, mapping={"status": "finished", "finished_at": progress["finished_at"]})
+    logger.info(f"Cache warm-up finished: {progress['done']} warmed, {progress['failed']} failed")
+    return {field: str(value) for field, value in progress.items()}
+
+
+async def _warm(session: AsyncSession, name: str, args: list[Any]) -> bool:
+    func = _warmers.get(name)
+    if func is None:
+        logger.warning(f"No cache warmer registered for {name}")
+        return False
+
+    try:
+        await func(session, *args)
+    except Exception as e:
+        logger.error(f"Cache warmer {name}{tuple(args)} failed: {e}")
+        await session.rollback()
+        return False
+    return True
+
+
+_flush_task: asyncio.Task | None = None
+
+
+async def _flush_periodically() -> None:
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL)
+        try:
+            await flush_hot_keys()
+        except Exception as e:
+            logger.error(f"Failed to flush hot cache keys: {e}")
+
+
+async def start_flusher() -> None:
+    global _flush_task
+
+    if _flush_task is None:
+        _flush_task = asyncio.create_task(_flush_periodically())
+
+
+async def stop_flusher() -> None:
+    global _flush_task
+
+    if _flush_task is None:
+        return
+
+    _flush_task.cancel()
+    try:
+        await _flush_task
+    except asyncio.CancelledError:
+        pass
+    _flush_task = None
+
+    try:
+        await flush_hot_keys()
+    except Exception as e:
+        logger.error(f"Failed to flush hot cache keys on shutdown: {e}")
@@ -1,22 +1,47 @@
+import asyncio
 import functools
+import gzip
 import json
+import math
+import random
 import re
-from collections.abc import Callable
+import time
+import uuid
+from collections.abc import Awaitable, Callable
 from typing import Any
 
+from app.core.config import settings
+from app.core.logger import logging
 from app.create_fastapi_app import redis_client
 from fastapi import Request, Response
 from fastapi.encoders import jsonable_encoder
+from redis.exceptions import ResponseError
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..db.db_helper import db_helper
 from ..exceptions.cache_exceptions import (
     CacheIdentificationInferenceError,
     InvalidRequestError,
     MissingClientError,
 )
+from .cache_metrics import cache_metrics
+from .etag import etag_matches, make_etag
+from .local_cache import invalidate_local, local_cache
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+logger = logging.getLogger(__name__)
 
 # pool: ConnectionPool | None = None
 # client: Redis | None = None
 
+# Включается, если хотя бы одна конечная точка использует локальный уровень кэша:
+# только тогда инвалидации нужно рассылать остальным воркерам.
+_local_tier_enabled = False
+
 
 def _infer_resource_id(kwargs: dict[str, Any], resource_id_type: type | tuple[type, ...]) -> int | str:
     """Определяет ID ресурса из словаря ключевых аргументов.
@@ -146,7 +171,7 @@ def _format_extra_data(to_invalidate_extra: dict[str, str], kwargs: dict[str, An
     return formatted_extra
 
 
-async def _delete_keys_by_pattern(pattern: str) -> None:
+async def _delete_keys_by_pattern(pattern: str) -> int:
     """Удаляет ключи из Redis, которые соответствуют заданному шаблону, используя команду SCAN.
 
     Эта функция итеративно сканирует пространство ключей Redis для ключей, соответствующих определенному шаблону
@@ -163,6 +188,11 @@ async def _delete_keys_by_pattern(pattern: str) -> None:
         Шаблон для сопоставления ключей. Шаблон может включать подстановочные знаки,
         такие как '*' для сопоставления любой последовательности символов. Пример: 'user:*'
 
+    Возвращает
+    ----------
+    int
+        Количество удаленных ключей.
+
     Примечания
     ----------
     - Команда SCAN используется с количеством 100 для получения ключей пакетами.
@@ -178,13 +208,583 @@ async def _delete_keys_by_pattern(pattern: str) -> None:
     if redis_client.client is None:
         raise MissingClientError
 
+    deleted = 0
     cursor = 0  # Начинаем с курсора 0
     while True:
         cursor, keys = await redis_client.client.scan(cursor, match=pattern, count=100)
         if keys:
-            await redis_client.client.delete(*keys)
+            deleted += await redis_client.client.delete(*keys)
         if cursor == 0:  # Когда курсор возвращается к 0, сканирование завершено
             break
+    return deleted
+
+
+TAG_KEY_PREFIX = "cache:tag:"
+
+# Добавляет ключ записи во множества тегов. TTL множества не уменьшается, чтобы оно жило не меньше своих записей.
+_REGISTER_TAGS_SCRIPT = """
+for _, tag_key in ipairs(KEYS) do
+    redis.call('SADD', tag_key, ARGV[1])
+    if redis.call('TTL', tag_key) < tonumber(ARGV[2]) then
+        redis.call('EXPIRE', tag_key, ARGV[2])
+    end
+end
+"""
+
+# Атомарно удаляет все записи тегов вместе с самими множествами и возвращает удаленные ключи.
+_INVALIDATE_TAGS_SCRIPT = """
+local removed = {}
+for _, tag_key in ipairs(KEYS) do
+    local members = redis.call('SMEMBERS', tag_key)
+    for i = 1, #members, 1000 do
+        redis.call('UNLINK', unpack(members, i, math.min(i + 999, #members)))
+    end
+    for _, member in ipairs(members) do
+        table.insert(removed, member)
+    end
+    redis.call('UNLINK', tag_key)
+end
+return removed
+"""
+
+
+def _tag_key(tag: str) -> str:
+    return f"{TAG_KEY_PREFIX}{tag}"
+
+
+async def _delete_keys_by_tags(tags: list[str]) -> list[str]:
+    """Удаляет из Redis все записи, зарегистрированные под заданными тегами.
+
+    В отличие от `_delete_keys_by_pattern`, стоимость операции пропорциональна количеству удаляемых записей,
+    а не размеру всего пространства ключей: члены тегов известны заранее и удаляются одним скриптом через UNLINK.
+
+    Параметры
+    ----------
+    tags: List[str]
+        Отформатированные теги, например 'user:1' или 'posts:user:1'.
+
+    Возвращает
+    ----------
+    List[str]
+        Удаленные ключи кэша.
+    """
+    if redis_client.client is None:
+        raise MissingClientError
+
+    if not tags:
+        return []
+
+    script = redis_client.get_script(_INVALIDATE_TAGS_SCRIPT)
+    removed = await script(keys=[_tag_key(tag) for tag in tags], client=redis_client.client)
+    return [key.decode() for key in removed]
+
+
+async def invalidate_tags(*tags: str) -> list[str]:
+    """Инвалидирует все записи кэша, зарегистрированные под тегами, в Redis и в локальных кэшах воркеров.
+
+    Используется вне декоратора `cache`, например, когда данные меняются в фоновой задаче.
+
+    Пример
+    ------
+    >>> await invalidate_tags(f"posts:user:{user_id}")
+    """
+    keys = await _delete_keys_by_tags(list(tags))
+    cache_metrics.observe("cache_invalidated_keys", TAG_KEY_PREFIX, "", len(keys))
+    if _local_tier_enabled and keys:
+        await invalidate_local(keys=keys)
+    return keys
+
+
+ENTITY_KEY_PREFIX = "entity:"
+
+
+def entity_key(entity: str, id: int) -> str:
+    return f"{ENTITY_KEY_PREFIX}{entity}:{id}"
+
+
+async def get_entities(
+    entity: str,
+    ids: list[int],
+    load_missing: Callable[[list[int]], Awaitable[list[dict[str, Any]]]],
+    expiration: int = 3600,
+) -> list[dict[str, Any]]:
+    """Собирает сущности по списку ID одним MGET, загружая из базы данных только отсутствующие в кэше.
+
+    Параметры
+    ----------
+    entity: str
+        Имя сущности в ключе кэша, например 'post'.
+    ids: List[int]
+        ID сущностей в нужном порядке.
+    load_missing: Callable[[List[int]], Awaitable[List[Dict[str, Any]]]]
+        Загружает сущности по ID, которых нет в кэше. Каждая сущность должна содержать поле 'id'.
+    expiration: int, optional
+        Время жизни загруженных сущностей в кэше в секундах.
+
+    Возвращает
+    ----------
+    List[Dict[str, Any]]
+        Сущности в порядке `ids`. Сущности, которых нет ни в кэше, ни в базе данных, пропускаются.
+    """
+    if redis_client.client is None:
+        raise MissingClientError
+
+    if not ids:
+        return []
+
+    cached = await redis_client.client.mget([entity_key(entity, id) for id in ids])
+    missing = [id for id, value in zip(ids, cached) if value is None]
+    cache_metrics.inc("cache_hits_total", f"{ENTITY_KEY_PREFIX}{entity}", "", len(ids) - len(missing))
+    cache_metrics.inc("cache_misses_total", f"{ENTITY_KEY_PREFIX}{entity}", "", len(missing))
+    loaded: dict[int, dict[str, Any]] = {}
+    if missing:
+        loaded = {row["id"]: row for row in jsonable_encoder(await load_missing(missing))}
+        async with redis_client.client.pipeline(transaction=False) as pipe:
+            for id, row in loaded.items():
+                pipe.set(entity_key(entity, id), json.dumps(row), ex=expiration)
+            await pipe.execute()
+
+    entities = []
+    for id, value in zip(ids, cached):
+        if value is not None:
+            entities.append(json.loads(value))
+        elif id in loaded:
+            entities.append(loaded[id])
+    return entities
+
+
+async def get_entity_page(
+    entity: str,
+    page_key: str,
+    load_page: Callable[[], Awaitable[dict[str, Any]]],
+    load_missing: Callable[[list[int]], Awaitable[list[dict[str, Any]]]],
+    tags: list[str] | None = None,
+    expiration: int = 3600,
+) -> dict[str, Any]:
+    """Возвращает страницу списка, кэшируя ее как список ID, а каждую сущность - отдельно.
+
+    Изменение одной сущности инвалидирует только ее ключ (`invalidate_entities`), а не все страницы, в которые
+    она входит. Страницы инвалидируются по тегам, когда меняется их состав (создание или удаление).
+
+    Параметры
+    ----------
+    entity: str
+        Имя сущности в ключе кэша, например 'post'.
+    page_key: str
+        Ключ кэша страницы, например 'posts:user:1:page:1:10'.
+    load_page: Callable[[], Awaitable[Dict[str, Any]]]
+        Загружает страницу из базы данных при промахе. Возвращает результат в формате `FastCRUD.get_multi`:
+        {'data': [...], 'total_count': int}.
+    load_missing: Callable[[List[int]], Awaitable[List[Dict[str, Any]]]]
+        Загружает сущности страницы, вытесненные из кэша.
+    tags: List[str] | None, optional
+        Теги, под которыми регистрируется страница.
+    expiration: int, optional
+        Время жизни страницы и сущностей в кэше в секундах.
+
+    Возвращает
+    ----------
+    Dict[str, Any]
+        Страница в формате `FastCRUD.get_multi`.
+
+    Пример
+    ------
+    >>> await get_entity_page("post", f"posts:user:{user_id}:page:{page}", load_page, load_posts, tags=[f"posts:user:{user_id}"])
+    """
+    if redis_client.client is None:
+        raise MissingClientError
+
+    cached_page = await redis_client.client.get(page_key)
+    if cached_page is not None:
+        cache_metrics.inc("cache_hits_total", f"page:{entity}", "")
+        page = json.loads(cached_page)
+        return {
+            "data": await get_entities(entity, page["ids"], load_missing, expiration),
+            "total_count": page["total_count"],
+        }
+
+    cache_metrics.inc("cache_misses_total", f"page:{entity}", "")
+
+    async def compute() -> dict[str, Any]:
+        crud_data = await load_page()
+        rows = jsonable_encoder(crud_data["data"])
+        page = {"ids": [row["id"] for row in rows], "total_count": crud_data["total_count"]}
+
+        async with redis_client.client.pipeline(transaction=False) as pipe:
+            pipe.set(page_key, json.dumps(page), ex=expiration)
+            for row in rows:
+                pipe.set(entity_key(entity, row["id"]), json.dumps(row), ex=expiration)
+            if tags:
+                register_tags = redis_client.get_script(_REGISTER_TAGS_SCRIPT)
+                await register_tags(keys=[_tag_key(tag) for tag in tags], args=[page_key, expiration], client=pipe)
+            await pipe.execute()
+
+        return {"data": rows, "total_count": crud_data["total_count"]}
+
+    return await _single_flight(page_key, compute)
+
+
+async def invalidate_entities(entity: str, *ids: int) -> None:
+    """Удаляет сущности из кэша. Страницы со ссылками на них остаются и подгрузят новые версии при чтении."""
+    if redis_client.client is None:
+        raise MissingClientError
+
+    if ids:
+        deleted = await redis_client.client.delete(*(entity_key(entity, id) for id in ids))
+        cache_metrics.observe("cache_invalidated_keys", f"{ENTITY_KEY_PREFIX}{entity}", "", deleted)
+
+
+NAMESPACE_KEY_PREFIX = "cache:ns:"
+NAMESPACE_MEMO_TTL = settings.cache.CACHE_NAMESPACE_MEMO_TTL
+
+
+def _namespace_key(namespace: str) -> str:
+    return f"{NAMESPACE_KEY_PREFIX}{namespace}"
+
+
+async def _namespace_generations(namespaces: list[str]) -> list[int]:
+    """Возвращает текущие поколения пространств имен.
+
+    Поколения кратковременно запоминаются в локальном кэше воркера, поэтому горячий путь обычно обходится
+    без обращения к Redis. Сброс запомненного значения при смене поколения рассылается всем воркерам.
+    """
+    keys = [_namespace_key(namespace) for namespace in namespaces]
+    generations = [local_cache.get(key) for key in keys]
+    missing = [key for key, generation in zip(keys, generations) if generation is None]
+    if not missing:
+        return generations
+
+    loaded = dict(zip(missing, await redis_client.client.mget(missing)))  # type: ignore
+    for i, key in enumerate(keys):
+        if generations[i] is None:
+            generations[i] = int(loaded[key] or 0)
+            local_cache.set(key, generations[i], ttl=NAMESPACE_MEMO_TTL)
+    return generations
+
+
+async def _versioned_key(cache_key: str, namespaces: list[str]) -> str:
+    generations = await _namespace_generations(namespaces)
+    return f"{cache_key}:g{'.'.join(map(str, generations))}"
+
+
+async def bump_namespaces(*namespaces: str) -> None:
+    """Инвалидирует все записи кэша пространств имен за O(1), увеличивая их поколения.
+
+    Старые записи не удаляются: ключи с прежним поколением больше не читаются и истекают по своему TTL.
+
+    Пример
+    ------
+    >>> await bump_namespaces(f"user:{user_id}", "tiers")
+    """
+    if redis_client.client is None:
+        raise MissingClientError
+
+    if not namespaces:
+        return
+
+    keys = [_namespace_key(namespace) for namespace in namespaces]
+    async with redis_client.client.pipeline(transaction=False) as pipe:
+        for key in keys:
+            pipe.incr(key)
+        await pipe.execute()
+    cache_metrics.inc("cache_namespace_bumps_total", NAMESPACE_KEY_PREFIX, "", len(keys))
+    await invalidate_local(keys=keys)
+
+
+async def _invalidate(
+    cache_key: str,
+    kwargs: dict[str, Any],
+    to_invalidate_extra: dict[str, Any] | None,
+    pattern_to_invalidate_extra: list[str] | None,
+    tags_to_invalidate: list[str] | None,
+) -> int:
+    """Удаляет ключ кэша и все дополнительные записи, указанные в декораторе, после вызова методом, отличным от GET.
+
+    Возвращает количество ключей, фактически удаленных из Redis.
+    """
+    invalidated_keys = [cache_key]
+    invalidated_patterns = []
+
+    deleted = await redis_client.client.delete(cache_key)  # type: ignore
+    if to_invalidate_extra is not None:
+        formatted_extra = _format_extra_data(to_invalidate_extra, kwargs)
+        for prefix, id in formatted_extra.items():
+            extra_cache_key = f"{prefix}:{id}"
+            deleted += await redis_client.client.delete(extra_cache_key)  # type: ignore
+            invalidated_keys.append(extra_cache_key)
+
+    if pattern_to_invalidate_extra is not None:
+        for pattern in pattern_to_invalidate_extra:
+            formatted_pattern = _format_prefix(pattern, kwargs)
+            deleted += await _delete_keys_by_pattern(formatted_pattern + "*")
+            invalidated_patterns.append(formatted_pattern + "*")
+
+    if tags_to_invalidate is not None:
+        formatted_tags = [_format_prefix(tag, kwargs) for tag in tags_to_invalidate]
+        tagged_keys = await _delete_keys_by_tags(formatted_tags)
+        deleted += len(tagged_keys)
+        invalidated_keys.extend(tagged_keys)
+
+    if _local_tier_enabled:
+        await invalidate_local(keys=invalidated_keys, patterns=invalidated_patterns)
+
+    return deleted
+
+
+LOCK_KEY_PREFIX = "cache:lock:"
+LOCK_POLL_INTERVAL = 0.05
+
+# Снимает блокировку, только если она все еще принадлежит нам (не истекла и не перехвачена другим воркером).
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Вычисления, выполняющиеся в данный момент в этом воркере, по ключу кэша.
+_inflight: dict[str, asyncio.Future] = {}
+
+
+async def _single_flight(key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+    """Объединяет одновременные промахи по одному ключу кэша внутри воркера в одно вычисление.
+
+    Первый запрос выполняет `compute`, остальные ожидают его результат (или исключение).
+    Если первый запрос отменен (например, клиент отключился), ожидающие запросы повторяют попытку сами.
+
+    Параметры
+    ----------
+    key: str
+        Ключ кэша.
+    compute: Callable[[], Awaitable[Any]]
+        Функция, вычисляющая и сохраняющая значение.
+
+    Возвращает
+    ----------
+    Any
+        Результат `compute`, общий для всех объединенных запросов.
+    """
+    future = _inflight.get(key)
+    if future is not None:
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if future.cancelled():
+                return await _single_flight(key, compute)
+            raise
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        result = await compute()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Помечаем исключение как полученное, если ожидающих запросов не было.
+        future.exception()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        _inflight.pop(key, None)
+
+
+async def _compute_with_lock(
+    key: str,
+    compute: Callable[[], Awaitable[Any]],
+    load: Callable[[], Awaitable[Any]],
+    lock_timeout: float,
+) -> Any:
+    """Защищает вычисление значения короткой блокировкой в Redis, чтобы его не повторяли другие воркеры.
+
+    Воркер, получивший блокировку, вычисляет значение. Остальные ждут, периодически перечитывая кэш,
+    и вычисляют значение сами, только если оно не появилось за `lock_timeout` секунд.
+
+    Параметры
+    ----------
+    key: str
+        Ключ кэша.
+    compute: Callable[[], Awaitable[Any]]
+        Функция, вычисляющая и сохраняющая значение.
+    load: Callable[[], Awaitable[Any]]
+        Функция, читающая значение из кэша. Возвращает None при промахе.
+    lock_timeout: float
+        Время жизни блокировки и максимальное время ожидания в секундах.
+    """
+    lock_key = f"{LOCK_KEY_PREFIX}{key}"
+    token = uuid.uuid4().hex
+    acquired = await redis_client.client.set(lock_key, token, nx=True, px=int(lock_timeout * 1000))
+    if not acquired:
+        deadline = time.monotonic() + lock_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            cached = await load()
+            if cached is not None:
+                return cached
+
+        return await compute()
+
+    try:
+        return await compute()
+    finally:
+        release_lock = redis_client.get_script(_RELEASE_LOCK_SCRIPT)
+        await release_lock(keys=[lock_key], args=[token], client=redis_client.client)
+
+
+REFRESH_LOCK_TIMEOUT = 10
+
+# Ключи, фоновое обновление которых уже запущено в этом воркере, и сами задачи (чтобы их не собрал GC).
+_refreshing: set[str] = set()
+_refresh_tasks: set[asyncio.Task] = set()
+
+
+def _should_refresh(fresh_until: float, delta: float, beta: float | None) -> bool:
+    """Решает, пора ли обновлять запись: она устарела или, по алгоритму XFetch, вероятностно досрочно.
+
+    Чем ближе истечение и чем дольше вычисляется значение (`delta`), тем выше вероятность досрочного обновления,
+    поэтому обновления горячих ключей распределяются во времени, а не совпадают с границей истечения.
+
+    Параметры
+    ----------
+    fresh_until: float
+        Время (unix timestamp), до которого запись считается свежей.
+    delta: float
+        Время последнего вычисления значения в секундах.
+    beta: float | None
+        Коэффициент XFetch. Значения больше 1 делают обновление более ранним. None отключает досрочное обновление.
+    """
+    now = time.time()
+    if beta is not None:
+        now -= delta * beta * math.log(1.0 - random.random())
+    return now >= fresh_until
+
+
+async def _refresh(key: str, refresh: Callable[[], Awaitable[Any]], lock_timeout: float) -> None:
+    lock_key = f"{LOCK_KEY_PREFIX}{key}"
+    token = uuid.uuid4().hex
+    try:
+        # Запись обновляет только один воркер, остальные продолжают отдавать текущее значение.
+        if not await redis_client.client.set(lock_key, token, nx=True, px=int(lock_timeout * 1000)):  # type: ignore
+            return
+
+        try:
+            await refresh()
+        finally:
+            release_lock = redis_client.get_script(_RELEASE_LOCK_SCRIPT)
+            await release_lock(keys=[lock_key], args=[token], client=redis_client.client)
+
+    except Exception as e:
+        logger.exception(f"Background cache refresh failed for key {key}: {e}")
+    finally:
+        _refreshing.discard(key)
+
+
+def _schedule_refresh(key: str, refresh: Callable[[], Awaitable[Any]], lock_timeout: float) -> None:
+    """Запускает фоновое обновление записи кэша, если оно еще не выполняется в этом воркере."""
+    if key in _refreshing:
+        return
+
+    _refreshing.add(key)
+    task = asyncio.create_task(_refresh(key, refresh, lock_timeout))
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+COMPRESSION_MIN_SIZE = settings.cache.CACHE_COMPRESSION_MIN_SIZE
+GZIP_COMPRESSLEVEL = 5
+
+
+def _encode_body(data: Any) -> bytes:
+    """Кодирует данные в тело JSON-ответа: через orjson, если он установлен, иначе через стандартный json."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _compress_body(body: bytes) -> tuple[bytes, str | None]:
+    """Сжимает тело gzip, если оно не меньше `CACHE_COMPRESSION_MIN_SIZE`. Возвращает (тело, Content-Encoding)."""
+    if len(body) < COMPRESSION_MIN_SIZE:
+        return body, None
+    return gzip.compress(body, compresslevel=GZIP_COMPRESSLEVEL), "gzip"
+
+
+def _body_response(request: Request, body: bytes, encoding: str | None, etag: str) -> Response:
+    """Отдает сохраненное тело как есть, если клиент принимает его кодировку, иначе распаковывает его.
+
+    На совпадающий If-None-Match отвечает 304 без тела, не распаковывая его. У сжатого представления
+    свой ETag: строгий ETag должен различаться для разных Content-Encoding.
+    """
+    headers = {}
+    if encoding is not None:
+        headers["Vary"] = "Accept-Encoding"
+        if encoding in request.headers.get("accept-encoding", ""):
+            headers["Content-Encoding"] = encoding
+            etag = f'{etag[:-1]}-{encoding}"'
+
+    headers["ETag"] = etag
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        headers.pop("Content-Encoding", None)
+        return Response(status_code=304, headers=headers)
+
+    if encoding is not None and "Content-Encoding" not in headers:
+        body = gzip.decompress(body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+ENTRY_FIELDS = ("data", "fresh_until", "delta", "encoding", "etag")
+
+
+def _pack_entry(data: Any, expiration: int, delta: float, raw_response: bool) -> tuple[dict[str, Any], Any]:
+    """Готовит поля хеша записи кэша и значение, которое хранится в локальном кэше и отдается запросам.
+
+    Параметры
+    ----------
+    data: Any
+        Данные ответа, уже приведенные `jsonable_encoder`.
+    expiration: int
+        Время свежести записи в секундах.
+    delta: float
+        Время вычисления значения в секундах, используется для досрочного обновления.
+    raw_response: bool
+        Хранить ли готовое тело ответа вместо JSON-данных.
+    """
+    mapping: dict[str, Any] = {"fresh_until": time.time() + expiration, "delta": delta}
+    if not raw_response:
+        mapping["data"] = json.dumps(data)
+        return mapping, data
+
+    body = _encode_body(data)
+    etag = make_etag(body)
+    body, encoding = _compress_body(body)
+    mapping["data"] = body
+    mapping["etag"] = etag
+    if encoding is not None:
+        mapping["encoding"] = encoding
+    return mapping, (body, encoding, etag)
+
+
+def _unpack_entry(fields: list[bytes | None], raw_response: bool) -> tuple[Any, float, float] | None:
+    """Разбирает поля хеша (в порядке `ENTRY_FIELDS`) в (значение, время окончания свежести, время вычисления)."""
+    data, fresh_until, delta, encoding, etag = fields
+    if data is None:
+        return None
+
+    if raw_response:
+        if etag is None:
+            etag = make_etag(gzip.decompress(data) if encoding else data)
+        value = (data, encoding.decode() if encoding else None, etag.decode() if isinstance(etag, bytes) else etag)
+    else:
+        value = json.loads(data.decode())
+    return value, float(fresh_until), float(delta)  # type: ignore
+
+
+def _route_label(request: Request) -> str:
+    """Шаблон пути маршрута (например, '/api/v1/post/{id}') для меток метрик: сам путь дал бы бесконечно много меток."""
+    route = request.scope.get("route")
+    return getattr(route, "path", "")
 
 
 def cache(
@@ -194,6 +794,15 @@ def cache(
     resource_id_type: type | tuple[type, ...] = int,
     to_invalidate_extra: dict[str, Any] | None = None,
     pattern_to_invalidate_extra: list[str] | None = None,
+    local_ttl: int | None = None,
+    tags: list[str] | None = None,
+    tags_to_invalidate: list[str] | None = None,
+    lock_timeout: float | None = None,
+    stale_ttl: int | None = None,
+    early_refresh_beta: float | None = None,
+    raw_response: bool = False,
+    namespaces: list[str] | None = None,
+    namespaces_to_bump: list[str] | None = None,
 ) -> Callable:
     """Декоратор кэша для FastAPI конечных точек.
 
@@ -219,6 +828,32 @@ def cache(
     pattern_to_invalidate_extra: List[str] | None, optional
         Список строковых шаблонов для ключей кэша, которые должны быть недействительными, когда декорированная функция вызывается.
         Это позволяет групповому удалению ключей кэша на основе сопоставления шаблона.
+    local_ttl: int | None, optional
+        Время жизни записи в локальном LRU-кэше воркера в секундах. Если предоставлено, попадания обслуживаются
+        из памяти процесса без обращения к Redis. По умолчанию None (локальный уровень отключен).
+    tags: List[str] | None, optional
+        Список шаблонов тегов (например, 'user:{user_id}'), под которыми регистрируется кэшированная запись на GET.
+    tags_to_invalidate: List[str] | None, optional
+        Список шаблонов тегов, все записи которых недействительны, когда декорированная функция вызывается методом,
+        отличным от GET. Рекомендуемая замена `pattern_to_invalidate_extra`.
+    lock_timeout: float | None, optional
+        Если предоставлено, промах защищается блокировкой в Redis на указанное количество секунд: значение вычисляет
+        только один воркер, остальные ждут его появления в кэше. По умолчанию None.
+    stale_ttl: int | None, optional
+        Сколько секунд после `expiration` запись еще хранится как устаревшая. В этом окне устаревшее значение
+        возвращается сразу, а обновление выполняется в фоне. По умолчанию None (запись удаляется по истечении).
+    early_refresh_beta: float | None, optional
+        Включает вероятностное досрочное обновление (XFetch) с указанным коэффициентом, обычно 1.0.
+        Запись обновляется в фоне незадолго до истечения, не дожидаясь промаха. По умолчанию None.
+    raw_response: bool, optional
+        Если True, в кэше хранится готовое тело JSON-ответа (сжатое gzip начиная с `CACHE_COMPRESSION_MIN_SIZE` байт),
+        и попадание возвращается как `Response` без повторной сериализации и проверки `response_model`.
+        Ответ содержит ETag тела, а на совпадающий If-None-Match возвращается 304. По умолчанию False.
+    namespaces: List[str] | None, optional
+        Список шаблонов пространств имен (например, 'user:{user_id}'), поколения которых включаются в ключ кэша.
+    namespaces_to_bump: List[str] | None, optional
+        Список шаблонов пространств имен, поколения которых увеличиваются, когда декорированная функция вызывается
+        методом, отличным от GET. Все записи этих пространств становятся недействительными одной записью в Redis.
 
     Возвращает
     ----------
@@ -288,9 +923,24 @@ def cache(
     - `to_invalidate_extra` и `pattern_to_invalidate_extra` используются для недействительности кэша на методах, отличных от GET.
     - Использование `pattern_to_invalidate_extra` может быть ресурсоемким на больших наборах данных. Используйте его осторожно и
       рассмотрите потенциальный эффект на производительности Redis.
+    - `tags_to_invalidate` удаляет ровно зарегистрированные под тегом записи, без сканирования всего Redis, поэтому
+      стоимость записи зависит от количества затронутых записей, а не от размера кэша.
+    - Одновременные промахи по одному ключу внутри воркера всегда объединяются в одно выполнение конечной точки.
+    - Фоновое обновление (`stale_ttl`, `early_refresh_beta`) вызывает конечную точку с новой сессией базы данных
+      вместо сессии запроса, которая к этому моменту уже закрыта. Его выполняет только один воркер.
+    - Поколения пространств имен запоминаются в воркере на `CACHE_NAMESPACE_MEMO_TTL` секунд. Смена поколения
+      рассылается всем воркерам, поэтому этот срок важен, только если сообщение потеряно.
+    - С `raw_response` результат конечной точки кэшируется без фильтрации по `response_model`, поэтому конечная точка
+      должна сама возвращать только публичные поля (например, через `schema_to_select`).
+    - При использовании `local_ttl` инвалидация на методах, отличных от GET, рассылается всем воркерам через Redis pub/sub.
+      Между записью и доставкой сообщения другой воркер может отдать устаревшие данные, но не дольше `local_ttl`.
     """
 
     def wrapper(func: Callable) -> Callable:
+        global _local_tier_enabled
+        if local_ttl is not None:
+            _local_tier_enabled = True
+
         @functools.wraps(func)
         async def inner(request: Request, *args: Any, **kwargs: Any) -> Response:
             if redis_client.client is None:
@@ -303,38 +953,100 @@ def cache(
 
             formatted_key_prefix = _format_prefix(key_prefix, kwargs)
             cache_key = f"{formatted_key_prefix}:{resource_id}"
+            if namespaces is not None:
+                cache_key = await _versioned_key(cache_key, [_format_prefix(namespace, kwargs) for namespace in namespaces])
             if request.method == "GET":
-                if to_invalidate_extra is not None or pattern_to_invalidate_extra is not None:
+                write_options = (to_invalidate_extra, pattern_to_invalidate_extra, tags_to_invalidate, namespaces_to_bump)
+                if any(option is not None for option in write_options):
                     raise InvalidRequestError
 
-                cached_data = await redis_client.client.get(cache_key)
-                if cached_data:
-                    return json.loads(cached_data.decode())
+                ttl = expiration + (stale_ttl or 0)
+                route = _route_label(request)
+
+                async def load() -> tuple[Any, float, float] | None:
+                    """Возвращает (значение, время окончания свежести, время вычисления) или None при промахе.
+
+                    Значение - это данные ответа, а с `raw_response` - (тело, Content-Encoding, ETag).
+                    """
+                    if local_ttl is not None:
+                        local_data = local_cache.get(cache_key)
+                        if local_data is not None:
+                            cache_metrics.inc("cache_local_hits_total", key_prefix, route)
+                            return local_data, math.inf, 0.0
+
+                    try:
+                        started = time.perf_counter()
+                        fields = await redis_client.client.hmget(cache_key, *ENTRY_FIELDS)
+                        cache_metrics.observe("cache_get_seconds", key_prefix, route, time.perf_counter() - started)
+                        entry = _unpack_entry(fields, raw_response)
+                    except ResponseError:
+                        # Запись в прежнем формате (строка) считается промахом и перезаписывается.
+                        return None
+
+                    if entry is not None and local_ttl is not None:
+                        local_cache.set(cache_key, entry[0], ttl=min(local_ttl, expiration))
+                    return entry
+
+                async def load_data() -> Any:
+                    entry = await load()
+                    return entry[0] if entry is not None else None
+
+                async def compute(call_kwargs: dict[str, Any]) -> Any:
+                    started = time.monotonic()
+                    result = await func(request, *args, **call_kwargs)
+                    delta = time.monotonic() - started
+                    mapping, value = _pack_entry(jsonable_encoder(result), expiration, delta, raw_response)
+
+                    # Запись хранится хешем: значение и метаданные свежести читаются одним HMGET.
+                    started = time.perf_counter()
+                    async with redis_client.client.pipeline(transaction=True) as pipe:
+                        pipe.delete(cache_key)
+                        pipe.hset(cache_key, mapping=mapping)
+                        pipe.expire(cache_key, ttl)
+                        if tags is not None:
+                            tag_keys = [_tag_key(_format_prefix(tag, kwargs)) for tag in tags]
+                            register_tags = redis_client.get_script(_REGISTER_TAGS_SCRIPT)
+                            await register_tags(keys=tag_keys, args=[cache_key, ttl], client=pipe)
+                        await pipe.execute()
+                    cache_metrics.observe("cache_set_seconds", key_prefix, route, time.perf_counter() - started)
+                    cache_metrics.observe("cache_payload_bytes", key_prefix, route, len(mapping["data"]))
+
+                    if local_ttl is not None:
+                        local_cache.set(cache_key, value, ttl=min(local_ttl, expiration))
+
+                    return value if raw_response else result
+
+                async def refresh() -> None:
+                    async with db_helper.session_factory() as session:
+                        await compute(
+                            {name: session if isinstance(value, AsyncSession) else value for name, value in kwargs.items()}
+                        )
+
+                entry = await load()
+                if entry is not None:
+                    cache_metrics.inc("cache_hits_total", key_prefix, route)
+                    value, fresh_until, delta = entry
+                    if _should_refresh(fresh_until, delta, early_refresh_beta):
+                        cache_metrics.inc("cache_stale_hits_total", key_prefix, route)
+                        _schedule_refresh(cache_key, refresh, lock_timeout or REFRESH_LOCK_TIMEOUT)
+                    return _body_response(request, *value) if raw_response else value
+
+                cache_metrics.inc("cache_misses_total", key_prefix, route)
+                if lock_timeout is None:
+                    value = await _single_flight(cache_key, lambda: compute(kwargs))
+                else:
+                    value = await _single_flight(
+                        cache_key, lambda: _compute_with_lock(cache_key, lambda: compute(kwargs), load_data, lock_timeout)
+                    )
+
+                # Response создается для каждого запроса: объединенные запросы разделяют только тело.
+                return _body_response(request, *value) if raw_response else value
 
             result = await func(request, *args, **kwargs)
-
-            if request.method == "GET":
-                serializable_data = jsonable_encoder(result)
-                serialized_data = json.dumps(serializable_data)
-
-                await redis_client.client.set(cache_key, serialized_data)
-                await redis_client.client.expire(cache_key, expiration)
-
-                serialized_data = json.loads(serialized_data)
-
-            else:
-                await redis_client.client.delete(cache_key)
-                if to_invalidate_extra is not None:
-                    formatted_extra = _format_extra_data(to_invalidate_extra, kwargs)
-                    for prefix, id in formatted_extra.items():
-                        extra_cache_key = f"{prefix}:{id}"
-                        await redis_client.client.delete(extra_cache_key)
-
-                if pattern_to_invalidate_extra is not None:
-                    for pattern in pattern_to_invalidate_extra:
-                        formatted_pattern = _format_prefix(pattern, kwargs)
-                        await _delete_keys_by_pattern(formatted_pattern + "*")
-
+            deleted = await _invalidate(cache_key, kwargs, to_invalidate_extra, pattern_to_invalidate_extra, tags_to_invalidate)
+            cache_metrics.observe("cache_invalidated_keys", key_prefix, _route_label(request), deleted)
+            if namespaces_to_bump is not None:
+                await bump_namespaces(*(_format_prefix(namespace, kwargs) for namespace in namespaces_to_bump))
             return result
 
         return inner
@@ -0,0 +1,102 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+from app.core.logger import logging
+
+from ..exceptions.circuit_breaker_exceptions import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitBreaker:
+    """Автоматический выключатель для вызовов внешнего сервиса (например, Redis) с ограничением по времени.
+
+    - closed: вызовы выполняются; после `failure_threshold` ошибок или таймаутов подряд выключатель размыкается.
+    - open: вызовы сразу завершаются `CircuitOpenError`, не дожидаясь сервиса.
+    - half_open: через `recovery_timeout` секунд пропускается один пробный вызов. Успех замыкает
+      выключатель, ошибка снова размыкает его.
+
+    Состояние хранится в памяти процесса, каждый воркер gunicorn решает самостоятельно.
+
+    Пример
+    ------
+    >>> breaker = CircuitBreaker("redis", failure_threshold=5, recovery_timeout=5.0, timeout=0.05)
+    >>> value = await breaker.call(redis_client.client.get, "key")
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, recovery_timeout: float, timeout: float | None = None) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.timeout = timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._probing = False
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Можно ли обращаться к сервису. В состоянии half_open разрешается только один пробный вызов."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self._state != self.CLOSED:
+            logger.info(f"Circuit breaker '{self.name}' closed: service recovered.")
+        self._state = self.CLOSED
+        self._failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                logger.warning(f"Circuit breaker '{self.name}' opened after {self._failures} failure(s).")
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._probing = False
+
+    async def call(self, func: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        """Выполняет вызов через выключатель с таймаутом `timeout`.
+
+        Исключения
+        ----------
+        CircuitOpenError
+            Выключатель разомкнут, вызов не выполнялся.
+        asyncio.TimeoutError
+            Вызов не уложился в `timeout`; засчитывается как ошибка.
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(f"Circuit breaker '{self.name}' is open.")
+
+        try:
+            result = await asyncio.wait_for(func(*args, **kwargs), self.timeout)
+        except asyncio.CancelledError:
+            # Вызов отменен снаружи, а не сервисом: следующий запрос снова сможет стать пробным.
+            self._probing = False
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+
+        self.record_success()
+        return result
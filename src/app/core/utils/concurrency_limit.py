@@ -0,0 +1,122 @@
+import asyncio
+import time
+import uuid
+
+from app.core.config import settings
+from app.core.logger import logging
+
+from ..exceptions.circuit_breaker_exceptions import CircuitOpenError
+from . import redis_client
+from .rate_limit import FAILURE_POLICY, RateLimitFailurePolicy, redis_breaker
+
+logger = logging.getLogger(__name__)
+
+LEASE_TIMEOUT = settings.rate_limit.RATE_LIMIT_CONCURRENCY_LEASE_TIMEOUT
+MAX_WAIT = settings.rate_limit.RATE_LIMIT_CONCURRENCY_MAX_WAIT
+RETRY_INTERVAL = 0.05
+
+# Распределенный семафор: занятые слоты хранятся в sorted set, score - время окончания аренды (мс, часы Redis).
+# Просроченные аренды (воркер упал, не освободив слот) удаляются перед каждой проверкой.
+# ARGV[1] - число слотов, ARGV[2] - срок аренды в мс, ARGV[3] - токен слота.
+_ACQUIRE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], now + tonumber(ARGV[2]), ARGV[3])
+redis.call('PEXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+# Слоты, занятые запросами этого воркера. Их не больше, чем в Redis, поэтому при заполненном
+# локальном счетчике запрос отклоняется без обращения к Redis.
+_in_flight: dict[str, int] = {}
+
+
+def _get_key(user_id: int | str) -> str:
+    return f"concurrency:{user_id}"
+
+
+async def acquire_slot(user_id: int | str, limit: int) -> str | None:
+    """Занимает один из `limit` слотов одновременных запросов пользователя.
+
+    Если свободных слотов нет, ждет освобождения не дольше `RATE_LIMIT_CONCURRENCY_MAX_WAIT` секунд.
+    Слот арендуется на `RATE_LIMIT_CONCURRENCY_LEASE_TIMEOUT` секунд: если воркер не освободит его
+    (например, упадет), слот освободится сам.
+
+    Параметры
+    ----------
+    user_id: int | str
+        ID пользователя.
+    limit: int
+        Сколько запросов пользователь может выполнять одновременно.
+
+    Возвращает
+    ----------
+    str | None
+        Токен слота, который нужно передать в `release_slot`, или None, если свободный слот не появился.
+
+    Примечание
+    ----------
+    Пока Redis недоступен (`redis_breaker`), слоты считаются только в памяти воркера,
+    а при политике `RATE_LIMIT_FAILURE_POLICY=closed` запрос отклоняется.
+    """
+    key = _get_key(user_id)
+    deadline = time.monotonic() + MAX_WAIT
+    while True:
+        token = await _try_acquire(key, limit)
+        if token is not None:
+            return token
+        if time.monotonic() + RETRY_INTERVAL > deadline:
+            return None
+        await asyncio.sleep(RETRY_INTERVAL)
+
+
+async def release_slot(user_id: int | str, token: str) -> None:
+    """Освобождает слот, занятый `acquire_slot`. Ошибки Redis не пробрасываются: слот освободится по окончании аренды."""
+    key = _get_key(user_id)
+    _release_locally(key)
+
+    try:
+        await redis_breaker.call(redis_client.client.zrem, key, token)  # type: ignore
+    except CircuitOpenError:
+        pass
+    except Exception as e:
+        logger.error(f"Failed to release concurrency slot for user {user_id}: {e!r}")
+
+
+async def _try_acquire(key: str, limit: int) -> str | None:
+    if _in_flight.get(key, 0) >= limit:
+        return None
+
+    # Слот резервируется локально до обращения к Redis, чтобы параллельные запросы воркера его учитывали.
+    _in_flight[key] = _in_flight.get(key, 0) + 1
+    token = uuid.uuid4().hex
+    try:
+        script = redis_client.get_script(_ACQUIRE_SCRIPT)
+        acquired = await redis_breaker.call(
+            script,
+            keys=[key],
+            args=[limit, int(LEASE_TIMEOUT * 1000), token],
+            client=redis_client.client,
+        )
+    except CircuitOpenError:
+        acquired = FAILURE_POLICY != RateLimitFailurePolicy.CLOSED
+    except Exception as e:
+        logger.error(f"Error acquiring concurrency slot {key}, applying '{FAILURE_POLICY.value}' policy: {e!r}")
+        acquired = FAILURE_POLICY != RateLimitFailurePolicy.CLOSED
+
+    if not acquired:
+        _release_locally(key)
+        return None
+    return token
+
+
+def _release_locally(key: str) -> None:
+    count = _in_flight.get(key, 0) - 1
+    if count > 0:
+        _in_flight[key] = count
+    else:
+        _in_flight.pop(key, None)
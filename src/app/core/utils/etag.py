@@ -0,0 +1,18 @@
+import hashlib
+
+
+def make_etag(body: bytes) -> str:
+    """Возвращает строгий ETag (в кавычках) для тела ответа."""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Проверяет заголовок If-None-Match по правилам слабого сравнения (RFC 9110, 13.1.2)."""
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    etag = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
@@ -0,0 +1,104 @@
+import fnmatch
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import Any
+
+from app.core.config import settings
+from app.core.logger import logging
+
+from . import broadcast
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = settings.cache.CACHE_INVALIDATION_CHANNEL
+
+
+class LocalCache:
+    """LRU-кэш в памяти процесса с ограничением по количеству записей и времени их жизни.
+
+    Используется как первый уровень перед Redis: каждый воркер gunicorn хранит собственную копию
+    самых горячих записей, поэтому попадание в него не требует сетевого запроса.
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    def delete_pattern(self, pattern: str) -> None:
+        """Удаляет записи, ключи которых соответствуют glob-шаблону в стиле Redis (например, 'user:*')."""
+        for key in [key for key in self._data if fnmatch.fnmatchcase(key, pattern)]:
+            del self._data[key]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+local_cache = LocalCache(
+    max_size=settings.cache.LOCAL_CACHE_MAX_SIZE,
+    ttl=settings.cache.LOCAL_CACHE_TTL,
+)
+
+
+def _evict(keys: Iterable[str], patterns: Iterable[str]) -> None:
+    local_cache.delete(*keys)
+    for pattern in patterns:
+        local_cache.delete_pattern(pattern)
+
+
+def handle_invalidation_message(message: dict[str, Any]) -> None:
+    _evict(message.get("keys", ()), message.get("patterns", ()))
+
+
+def subscribe_to_invalidations() -> None:
+    broadcast.subscribe(INVALIDATION_CHANNEL, handle_invalidation_message, reset=local_cache.clear)
+
+
+async def invalidate_local(keys: Iterable[str] = (), patterns: Iterable[str] = ()) -> None:
+    """Удаляет ключи из локального кэша текущего воркера и рассылает инвалидацию остальным воркерам.
+
+    Параметры
+    ---------
+    keys: Iterable[str]
+        Точные ключи кэша.
+    patterns: Iterable[str]
+        Glob-шаблоны ключей кэша в стиле Redis.
+
+    Примечание
+    ----------
+    Ошибка публикации не прерывает запрос: в этом случае записи в других воркерах устареют не более чем на их TTL.
+    """
+    keys, patterns = list(keys), list(patterns)
+    _evict(keys, patterns)
+    try:
+        await broadcast.publish(INVALIDATION_CHANNEL, {"keys": keys, "patterns": patterns})
+    except Exception as e:
+        logger.exception(f"Failed to broadcast local cache invalidation: {e}")
@@ -0,0 +1,93 @@
+import json
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from app.core.config import settings
+from app.core.logger import logging
+from fastapi.encoders import jsonable_encoder
+
+from ..exceptions.cache_exceptions import MissingClientError
+from . import redis_client
+from .cache_metrics import cache_metrics
+from .local_cache import invalidate_local, local_cache
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_KEY_PREFIX = "principal:"
+PRINCIPAL_TTL = settings.cache.PRINCIPAL_CACHE_TTL
+PRINCIPAL_LOCAL_TTL = settings.cache.PRINCIPAL_CACHE_LOCAL_TTL
+
+# Хеш пароля аутентификации не нужен и в кэш не попадает.
+_EXCLUDED_FIELDS = ("hashed_password",)
+
+
+def principal_key(user_id: int) -> str:
+    return f"{PRINCIPAL_KEY_PREFIX}{user_id}"
+
+
+async def get_principal(user_id: int, load: Callable[[], Awaitable[dict[str, Any] | None]]) -> dict[str, Any] | None:
+    """Возвращает пользователя токена из кэша: сначала из памяти воркера, затем из Redis, и только потом из базы данных.
+
+    Параметры
+    ----------
+    user_id: int
+        ID пользователя из claim `sub`.
+    load: Callable[[], Awaitable[Dict[str, Any] | None]]
+        Загружает пользователя из базы данных при промахе. None - пользователя нет (или он удален), такой ответ не кэшируется.
+
+    Возвращает
+    ----------
+    Dict[str, Any] | None
+        Копия записи пользователя без `hashed_password`; даты сериализованы в строки ISO 8601.
+
+    Примечание
+    ----------
+    Запись живет в Redis `PRINCIPAL_CACHE_TTL` секунд, в памяти воркера - `PRINCIPAL_CACHE_LOCAL_TTL` секунд.
+    Изменения пользователя должны вызывать `invalidate_principals`. Ошибки Redis не прерывают
+    аутентификацию: пользователь загружается из базы данных.
+    """
+    key = principal_key(user_id)
+    principal = local_cache.get(key)
+    if principal is not None:
+        cache_metrics.inc("cache_hits_total", PRINCIPAL_KEY_PREFIX, "")
+        return dict(principal)
+
+    if redis_client.client is None:
+        raise MissingClientError
+
+    cached = None
+    try:
+        cached = await redis_client.client.get(key)
+    except Exception as e:
+        logger.error(f"Failed to read principal {user_id} from cache: {e}")
+
+    if cached is not None:
+        cache_metrics.inc("cache_hits_total", PRINCIPAL_KEY_PREFIX, "")
+        principal = json.loads(cached)
+    else:
+        cache_metrics.inc("cache_misses_total", PRINCIPAL_KEY_PREFIX, "")
+        user = await load()
+        if user is None:
+            return None
+
+        principal = jsonable_encoder({field: value for field, value in user.items() if field not in _EXCLUDED_FIELDS})
+        try:
+            await redis_client.client.set(key, json.dumps(principal), ex=PRINCIPAL_TTL)
+        except Exception as e:
+            logger.error(f"Failed to cache principal {user_id}: {e}")
+
+    local_cache.set(key, principal, ttl=PRINCIPAL_LOCAL_TTL)
+    return dict(principal)
+
+
+async def invalidate_principals(*user_ids: int) -> None:
+    """Удаляет пользователей из кэша в Redis и в памяти всех воркеров."""
+    if redis_client.client is None:
+        raise MissingClientError
+
+    if not user_ids:
+        return
+
+    keys = [principal_key(user_id) for user_id in user_ids]
+    await redis_client.client.delete(*keys)
+    await invalidate_local(keys=keys)
@@ -1,44 +1,495 @@
+import asyncio
+import math
+import time
 from datetime import UTC, datetime
+from enum import Enum
 
+from app.core.config import settings
 from app.core.logger import logging
-from app.create_fastapi_app import redis_client
 
 # from app.core.utils.redis_client import client
-from app.schemas.rate_limit import sanitize_path
+from app.schemas.rate_limit import RateLimitAlgorithm, sanitize_path
+from fastapi import Request
+
+from ..exceptions.circuit_breaker_exceptions import CircuitOpenError
+from . import redis_client
+from .circuit_breaker import CircuitBreaker
+from .local_cache import LocalCache
 
 logger = logging.getLogger(__name__)
 
+LOCAL_SYNC_INTERVAL = settings.rate_limit.RATE_LIMIT_LOCAL_SYNC_INTERVAL
+
+
+class RateLimitFailurePolicy(str, Enum):
+    """Что делать с запросом, пока Redis недоступен или отвечает слишком медленно."""
+
+    LOCAL = "local"  # считать запросы в памяти воркера
+    OPEN = "open"  # пропускать все запросы
+    CLOSED = "closed"  # отклонять все запросы
+
+
+FAILURE_POLICY = RateLimitFailurePolicy(settings.rate_limit.RATE_LIMIT_FAILURE_POLICY)
+
+# Любая ошибка или таймаут Redis не превращает запрос в 500: после нескольких ошибок подряд
+# воркер перестает ждать Redis и до восстановления применяет FAILURE_POLICY.
+redis_breaker = CircuitBreaker(
+    "rate_limit",
+    failure_threshold=settings.rate_limit.RATE_LIMIT_BREAKER_FAILURE_THRESHOLD,
+    recovery_timeout=settings.rate_limit.RATE_LIMIT_BREAKER_RECOVERY_TIMEOUT,
+    timeout=settings.rate_limit.RATE_LIMIT_REDIS_TIMEOUT,
+)
+
+# Счетчики фиксированного окна для политики LOCAL.
+_fallback_counters = LocalCache(max_size=settings.rate_limit.RATE_LIMIT_FALLBACK_MAX_KEYS, ttl=60)
+
 # uncomment if you use another redis for rate limit
 # pool: ConnectionPool | None = None
 # client: Redis | None = None
 
 
-async def is_rate_limited(
-    user_id: int,
+class RateLimitStorage(str, Enum):
+    """Как хранятся счетчики окон (фиксированное и скользящее окно, приближенный режим)."""
+
+    KEYS = "keys"  # отдельный ключ на пользователя, путь и окно
+    HASH = "hash"  # один хеш на пользователя, период и окно, путь - поле хеша
+
+
+STORAGE = RateLimitStorage(settings.rate_limit.RATE_LIMIT_STORAGE)
+
+# Все алгоритмы выполняются одним Lua-скриптом за один запрос к Redis и возвращают
+# {ограничен ли запрос (0/1), оставшаяся квота, секунд до сброса}. Запрос расходует `cost` единиц квоты.
+
+# Счетчики окон работают с обоими вариантами хранения: при пустом поле - строковый ключ, иначе поле хеша.
+_COUNTER_FUNCTIONS = """
+local function counter_get(key, field)
+    if field == '' then
+        return tonumber(redis.call('GET', key) or '0')
+    end
+    return tonumber(redis.call('HGET', key, field) or '0')
+end
+local function counter_incrby(key, field, amount)
+    if field == '' then
+        return redis.call('INCRBY', key, amount)
+    end
+    return redis.call('HINCRBY', key, field, amount)
+end
+"""
+
+# Фиксированное окно: INCRBY, TTL и сравнение с лимитом выполняются атомарно.
+# ARGV[2] - секунд до конца окна, ARGV[3] - стоимость запроса.
+# TTL ставится и тогда, когда у ключа его нет, поэтому ключ без срока жизни не может остаться в Redis.
+_FIXED_WINDOW_SCRIPT = (
+    _COUNTER_FUNCTIONS
+    + """
+local current = counter_incrby(KEYS[1], ARGV[4], tonumber(ARGV[3]))
+local ttl = redis.call('TTL', KEYS[1])
+if ttl < 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+    ttl = tonumber(ARGV[2])
+end
+local limit = tonumber(ARGV[1])
+if current > limit then
+    -- Отклоненный запрос не расходует квоту: иначе дорогой запрос сверх лимита сжег бы ее остаток.
+    current = counter_incrby(KEYS[1], ARGV[4], -tonumber(ARGV[3]))
+    return {1, math.max(limit - current, 0), ttl}
+end
+return {0, limit - current, ttl}
+"""
+)
+
+# Скользящее окно (счетчик): счетчик предыдущего окна учитывается с весом оставшейся доли периода,
+# поэтому на границе окон нельзя отправить вдвое больше лимита. KEYS[1] - текущее окно, KEYS[2] - предыдущее,
+# ARGV[3] - сколько миллисекунд прошло с начала текущего окна, ARGV[4] - стоимость. Отклоненные запросы не учитываются.
+_SLIDING_WINDOW_SCRIPT = (
+    _COUNTER_FUNCTIONS
+    + """
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3]) / 1000
+local cost = tonumber(ARGV[4])
+local previous = counter_get(KEYS[2], ARGV[5])
+local current = counter_get(KEYS[1], ARGV[5])
+local estimate = math.floor(previous * (period - elapsed) / period) + current
+local reset_after = math.ceil(period - elapsed)
+if estimate + cost > limit then
+    return {1, math.max(limit - estimate, 0), reset_after}
+end
+counter_incrby(KEYS[1], ARGV[5], cost)
+redis.call('EXPIRE', KEYS[1], period * 2)
+return {0, limit - estimate - cost, reset_after}
+"""
+)
+
+# Маркерная корзина: емкость limit, пополняется со скоростью limit / period маркеров в секунду.
+# Запрос забирает ARGV[3] маркеров.
+# Время берется из Redis (TIME), чтобы часы воркеров не влияли на результат.
+_TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local rate = capacity / period
+local cost = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - ts, 0) * rate)
+local limited = 1
+if tokens >= cost then
+    tokens = tokens - cost
+    limited = 0
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(period))
+local reset_after = math.ceil((capacity - tokens) / rate)
+if limited == 1 then
+    reset_after = math.ceil((cost - tokens) / rate)
+end
+return {limited, math.floor(tokens), reset_after}
+"""
+
+# GCRA: хранится одно значение - теоретическое время прибытия следующего запроса (TAT, мс).
+# Запрос проходит, если TAT + интервал * стоимость (ARGV[3]) - период не позже текущего времени;
+# допускается всплеск до limit единиц.
+_GCRA_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2]) * 1000
+local interval = period / limit
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + tonumber(time[2]) / 1000
+local tat = math.max(tonumber(redis.call('GET', KEYS[1]) or '0'), now)
+local new_tat = tat + interval * tonumber(ARGV[3])
+local allow_at = new_tat - period
+if now < allow_at then
+    return {1, 0, math.ceil((allow_at - now) / 1000)}
+end
+redis.call('SET', KEYS[1], string.format('%.3f', new_tat), 'PX', math.ceil(new_tat - now))
+-- Небольшой допуск компенсирует погрешность деления period / limit.
+return {0, math.floor((period - (new_tat - now)) / interval + 0.001), math.ceil((new_tat - now) / 1000)}
+"""
+
+# Приближенный режим: воркер добавляет накопленные локально запросы к счетчику фиксированного окна
+# и получает общее значение. Ключ тот же, что у фиксированного окна, поэтому режимы совместимы.
+_SYNC_SCRIPT = (
+    _COUNTER_FUNCTIONS
+    + """
+local current = counter_incrby(KEYS[1], ARGV[3], ARGV[1])
+if redis.call('TTL', KEYS[1]) < 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return current
+"""
+)
+
+_SCRIPTS = {
+    RateLimitAlgorithm.FIXED_WINDOW: _FIXED_WINDOW_SCRIPT,
+    RateLimitAlgorithm.SLIDING_WINDOW: _SLIDING_WINDOW_SCRIPT,
+    RateLimitAlgorithm.TOKEN_BUCKET: _TOKEN_BUCKET_SCRIPT,
+    RateLimitAlgorithm.GCRA: _GCRA_SCRIPT,
+}
+
+
+class RateLimitResult:
+    """Результат проверки лимита: превышен ли он, сколько запросов осталось и через сколько секунд окно сбросится."""
+
+    def __init__(self, limited: bool, limit: int, remaining: int, reset_after: int) -> None:
+        self.limited = limited
+        self.limit = limit
+        self.remaining = remaining
+        self.reset_after = reset_after
+
+    @property
+    def headers(self) -> dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(self.reset_after),
+        }
+        if self.limited:
+            headers["Retry-After"] = str(self.reset_after)
+        return headers
+
+
+async def load_scripts() -> None:
+    """Загружает Lua-скрипты в Redis при старте, чтобы первые запросы сразу выполнялись через EVALSHA."""
+    if redis_client.client is None:
+        logger.error("Redis client is not initialized.")
+        raise Exception("Redis client is not initialized.")
+
+    for source in (*_SCRIPTS.values(), _SYNC_SCRIPT):
+        await redis_client.client.script_load(source)
+
+
+def get_route_path(request: Request) -> str:
+    """Очищенный шаблон маршрута, по которому ищутся правила и строятся ключи счетчиков.
+
+    '/api/v1/post/123' и '/api/v1/post/124' дают один шаблон 'api_v1_post_{id}', поэтому правило
+    для маршрута с параметрами применяется, а число ключей в Redis не растет вместе с числом разных URL.
+    Без найденного маршрута используется сам путь запроса.
+    """
+    route = request.scope.get("route")
+    return sanitize_path(getattr(route, "path_format", None) or request.url.path)
+
+
+def get_request_cost(cost: int = 1, cost_per_kb: int = 0, content_length: str | None = None) -> int:
+    """Стоимость запроса в единицах квоты: `cost` плюс `cost_per_kb` за каждый начатый килобайт тела.
+
+    Размер берется из заголовка Content-Length, поэтому тело не читается; без заголовка
+    (например, при chunked-передаче) учитывается только `cost`.
+    """
+    if not cost_per_kb or not content_length:
+        return cost
+
+    try:
+        size = int(content_length)
+    except ValueError:
+        return cost
+    return cost + cost_per_kb * math.ceil(max(size, 0) / 1024)
+
+
+def _build_request(
+    user_id: int | str,
     path: str,
     limit: int,
     period: int,
-) -> bool:
+    algorithm: RateLimitAlgorithm,
+    cost: int = 1,
+) -> tuple[list[str], list[int | str]]:
+    """Возвращает ключи и аргументы Lua-скрипта алгоритма.
+
+    Последний аргумент счетчиков окон - поле хеша: при хранении `STORAGE = HASH` счетчики всех путей
+    пользователя за одно окно лежат в одном хеше `ratelimit:{user_id}:{period}:{window_start}`,
+    иначе поле пустое и у каждого пути свой ключ.
+    """
+    path = sanitize_path(path)
+    key_prefix = f"ratelimit:{user_id}:{path}"
+    if algorithm in (RateLimitAlgorithm.TOKEN_BUCKET, RateLimitAlgorithm.GCRA):
+        return [f"{key_prefix}:{algorithm.value}"], [limit, period, cost]
+
+    if STORAGE == RateLimitStorage.HASH:
+        key_prefix, field = f"ratelimit:{user_id}:{period}", path
+    else:
+        field = ""
+
+    current_timestamp = datetime.now(UTC).timestamp()
+    window_start = int(current_timestamp) - (int(current_timestamp) % period)
+    if algorithm == RateLimitAlgorithm.SLIDING_WINDOW:
+        elapsed_ms = int((current_timestamp - window_start) * 1000)
+        keys = [f"{key_prefix}:sw:{window_start}", f"{key_prefix}:sw:{window_start - period}"]
+        return keys, [limit, period, elapsed_ms, cost, field]
+
+    # Ключ окна живет только до конца окна.
+    return [f"{key_prefix}:{window_start}"], [limit, window_start + period - int(current_timestamp), cost, field]
+
+
+async def check_rate_limit(
+    user_id: int | str,
+    path: str,
+    limit: int,
+    period: int,
+    algorithm: RateLimitAlgorithm | str = RateLimitAlgorithm.FIXED_WINDOW,
+    sync_hits: int = 0,
+    cost: int = 1,
+) -> RateLimitResult:
+    """Учитывает запрос и проверяет лимит выбранным алгоритмом за один запрос к Redis.
+
+    Если Redis не ответил за `RATE_LIMIT_REDIS_TIMEOUT` секунд, вернул ошибку или выключатель `redis_breaker`
+    разомкнут, решение принимается по политике `RATE_LIMIT_FAILURE_POLICY`.
+
+    Параметры
+    ----------
+    user_id: int | str
+        ID пользователя или IP-адрес анонимного клиента.
+    path: str
+        Путь запроса; очищается через `sanitize_path`.
+    limit: int
+        Сколько запросов разрешено за период.
+    period: int
+        Период в секундах.
+    algorithm: RateLimitAlgorithm | str, optional
+        Алгоритм из `RateLimitAlgorithm`. По умолчанию фиксированное окно.
+    sync_hits: int, optional
+        Если больше 0 и выбран алгоритм фиксированного окна, включает приближенный режим: воркер считает
+        запросы локально и синхронизирует счетчик с Redis раз в `sync_hits` запросов или раз в
+        `RATE_LIMIT_LOCAL_SYNC_INTERVAL` секунд. Лимит может быть превышен не более чем на
+        `sync_hits` запросов на каждый воркер за окно. По умолчанию 0 - каждый запрос проверяется в Redis.
+    cost: int, optional
+        Сколько единиц квоты расходует запрос (см. `get_request_cost`). По умолчанию 1.
+        Запрос дороже `limit` не пройдет никогда.
+
+    Возвращает
+    ----------
+    RateLimitResult
+        Превышен ли лимит, оставшаяся квота и время до сброса в секундах.
+    """
     if redis_client.client is None:
         logger.error("Redis client is not initialized.")
         raise Exception("Redis client is not initialized.")
 
-    current_timestamp = int(datetime.now(UTC).timestamp())
-    window_start = current_timestamp - (current_timestamp % period)
+    algorithm = RateLimitAlgorithm(algorithm)
+    keys, args = _build_request(user_id, path, limit, period, algorithm, cost)
+    if sync_hits > 0 and algorithm == RateLimitAlgorithm.FIXED_WINDOW:
+        return await _check_locally(keys[0], str(args[-1]), limit, period, sync_hits, cost)
+
+    try:
+        script = redis_client.get_script(_SCRIPTS[algorithm])
+        limited, remaining, reset_after = await redis_breaker.call(script, keys=keys, args=args, client=redis_client.client)
+    except CircuitOpenError:
+        return _check_fallback(user_id, path, limit, period, cost)
+    except Exception as e:
+        logger.error(
+            f"Error checking rate limit for user {user_id} on path {path}, applying '{FAILURE_POLICY.value}' policy: {e!r}"
+        )
+        return _check_fallback(user_id, path, limit, period, cost)
+
+    return RateLimitResult(limited=bool(limited), limit=limit, remaining=remaining, reset_after=reset_after)
+
+
+async def is_rate_limited(
+    user_id: int | str,
+    path: str,
+    limit: int,
+    period: int,
+    algorithm: RateLimitAlgorithm | str = RateLimitAlgorithm.FIXED_WINDOW,
+    sync_hits: int = 0,
+    cost: int = 1,
+) -> bool:
+    result = await check_rate_limit(
+        user_id=user_id,
+        path=path,
+        limit=limit,
+        period=period,
+        algorithm=algorithm,
+        sync_hits=sync_hits,
+        cost=cost,
+    )
+    return result.limited
+
+
+def _check_fallback(user_id: int | str, path: str, limit: int, period: int, cost: int = 1) -> RateLimitResult:
+    """Решение без Redis по политике FAILURE_POLICY. Для LOCAL лимит считается фиксированным окном в памяти воркера."""
+    reset_after = period - int(time.time()) % period
+    if FAILURE_POLICY == RateLimitFailurePolicy.OPEN:
+        return RateLimitResult(limited=False, limit=limit, remaining=limit, reset_after=reset_after)
+    if FAILURE_POLICY == RateLimitFailurePolicy.CLOSED:
+        retry_after = math.ceil(redis_breaker.recovery_timeout)
+        return RateLimitResult(limited=True, limit=limit, remaining=0, reset_after=retry_after)
+
+    keys, args = _build_request(user_id, path, limit, period, RateLimitAlgorithm.FIXED_WINDOW)
+    counter_key = f"{keys[0]}:{args[-1]}"
+    count = _fallback_counters.get(counter_key, 0)
+    if count + cost > limit:
+        return RateLimitResult(limited=True, limit=limit, remaining=max(limit - count, 0), reset_after=reset_after)
+    _fallback_counters.set(counter_key, count + cost, ttl=reset_after)
+    return RateLimitResult(limited=False, limit=limit, remaining=limit - count - cost, reset_after=reset_after)
+
 
-    sanitized_path = sanitize_path(path)
-    key = f"ratelimit:{user_id}:{sanitized_path}:{window_start}"
+class _LocalWindow:
+    """Счетчик одного окна в памяти воркера: последнее известное общее значение и еще не отправленные запросы."""
 
+    __slots__ = ("key", "field", "ends_at", "count", "pending", "synced_at", "syncing")
+
+    def __init__(self, key: str, field: str, ends_at: float) -> None:
+        self.key = key
+        self.field = field
+        self.ends_at = ends_at
+        self.count = 0
+        self.pending = 0
+        self.synced_at = time.monotonic()
+        self.syncing = False
+
+
+_local_windows: dict[str, _LocalWindow] = {}
+_sync_task: asyncio.Task | None = None
+
+
+async def _check_locally(key: str, field: str, limit: int, period: int, sync_hits: int, cost: int = 1) -> RateLimitResult:
+    counter_key = f"{key}:{field}"
+    window = _local_windows.get(counter_key)
+    if window is None:
+        now = time.time()
+        window = _local_windows[counter_key] = _LocalWindow(key, field, ends_at=now - now % period + period)
+
+    reset_after = max(int(window.ends_at - time.time()), 1)
+    used = window.count + window.pending
+    if used + cost > limit:
+        return RateLimitResult(limited=True, limit=limit, remaining=max(limit - used, 0), reset_after=reset_after)
+
+    window.pending += cost
+    if window.pending >= sync_hits or time.monotonic() - window.synced_at >= LOCAL_SYNC_INTERVAL:
+        try:
+            await _sync_window(window)
+        except CircuitOpenError:
+            pass
+        except Exception as e:
+            # Запросы остаются в локальном счетчике и будут отправлены при следующей синхронизации.
+            logger.error(f"Failed to sync local rate limit counter {key}: {e!r}")
+
+    return RateLimitResult(limited=False, limit=limit, remaining=max(limit - used - cost, 0), reset_after=reset_after)
+
+
+async def _sync_window(window: _LocalWindow) -> None:
+    """Отправляет локальные запросы окна в Redis и обновляет общее значение счетчика."""
+    if window.syncing:
+        return
+
+    delta, window.pending = window.pending, 0
+    window.syncing = True
     try:
-        current_count = await redis_client.client.incr(key)
-        if current_count == 1:
-            await redis_client.client.expire(key, period)
+        sync = redis_client.get_script(_SYNC_SCRIPT)
+        ttl = max(math.ceil(window.ends_at - time.time()), 1)
+        count = await redis_breaker.call(sync, keys=[window.key], args=[delta, ttl, window.field], client=redis_client.client)
+    except Exception:
+        # Возвращаем запросы, чтобы отправить их при следующей синхронизации.
+        window.pending += delta
+        raise
+    finally:
+        window.syncing = False
 
-        if current_count > limit:
-            return True
+    # Запросы, пришедшие во время синхронизации, остаются в pending.
+    window.count = int(count)
+    window.synced_at = time.monotonic()
 
-    except Exception as e:
-        logger.exception(f"Error checking rate limit for user {user_id} on path {path}: {e}")
-        raise e
 
-    return False
+async def sync_local_counters() -> None:
+    """Синхронизирует с Redis все локальные окна, где есть неотправленные запросы, и удаляет закончившиеся."""
+    now = time.time()
+    for key, window in list(_local_windows.items()):
+        if window.pending:
+            try:
+                await _sync_window(window)
+            except CircuitOpenError:
+                pass
+            except Exception as e:
+                logger.error(f"Failed to sync local rate limit counter {key}: {e}")
+        if window.ends_at <= now and not window.pending:
+            _local_windows.pop(key, None)
+
+
+async def _sync_periodically() -> None:
+    while True:
+        await asyncio.sleep(LOCAL_SYNC_INTERVAL)
+        await sync_local_counters()
+
+
+async def start_local_sync() -> None:
+    global _sync_task
+
+    if _sync_task is None:
+        _sync_task = asyncio.create_task(_sync_periodically())
+
+
+async def stop_local_sync() -> None:
+    global _sync_task
+
+    if _sync_task is None:
+        return
+
+    _sync_task.cancel()
+    try:
+        await _sync_task
+    except asyncio.CancelledError:
+        pass
+    _sync_task = None
+    await sync_local_counters()
@@ -0,0 +1,229 @@
+import asyncio
+from typing import Any
+
+from app.core.config import settings
+from app.core.logger import logging
+from app.crud.crud_rate_limits import crud_rate_limits
+from app.crud.crud_tiers import crud_tiers
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db.db_helper import db_helper
+from ..exceptions.cache_exceptions import MissingClientError
+from . import broadcast, redis_client
+
+logger = logging.getLogger(__name__)
+
+RULES_VERSION_KEY = "ratelimit:rules:version"
+RULES_CHANNEL = settings.rate_limit.RATE_LIMIT_RULES_CHANNEL
+CHECK_INTERVAL = settings.rate_limit.RATE_LIMIT_RULES_CHECK_INTERVAL
+
+DEFAULT_LIMIT = settings.rate_limit.DEFAULT_LIMIT
+DEFAULT_PERIOD = settings.rate_limit.DEFAULT_PERIOD
+DEFAULT_ALGORITHM = settings.rate_limit.DEFAULT_ALGORITHM
+
+
+class RateLimitRules:
+    """Снимок тарифов и правил ограничения запросов, загруженный в память воркера.
+
+    Правила хранятся по ключу (tier_id, путь), поэтому проверка лимита не обращается к базе данных.
+    Лимиты одновременных запросов хранятся по tier_id, тарифы без ограничения в `concurrency` не попадают.
+    Снимок неизменяем: при обновлении правил воркер целиком заменяет его новым.
+    """
+
+    def __init__(
+        self,
+        version: int,
+        tiers: dict[int, str],
+        limits: dict[tuple[int, str], tuple[int, int, str, int, int, int]],
+        concurrency: dict[int, int] | None = None,
+    ) -> None:
+        self.version = version
+        self.tiers = tiers
+        self.limits = limits
+        self.concurrency = concurrency or {}
+
+    def get_tier_name(self, tier_id: int | None) -> str | None:
+        return self.tiers.get(tier_id)  # type: ignore
+
+    def get_limit(self, tier_id: int, path: str) -> tuple[int, int, str, int, int, int] | None:
+        """Возвращает (limit, period, algorithm, sync_hits, cost, cost_per_kb) для тарифа и пути или None, если правила нет."""
+        return self.limits.get((tier_id, path))
+
+    def get_max_concurrency(self, tier_id: int | None) -> int | None:
+        return self.concurrency.get(tier_id)  # type: ignore
+
+
+_rules: RateLimitRules | None = None
+_lock = asyncio.Lock()
+_refresh_tasks: set[asyncio.Task] = set()
+_check_task: asyncio.Task | None = None
+
+
+async def load_rules(session: AsyncSession, version: int) -> RateLimitRules:
+    tiers_data = await crud_tiers.get_multi(db=session, limit=None, return_total_count=False)
+    rate_limits_data = await crud_rate_limits.get_multi(db=session, limit=None, return_total_count=False)
+    return RateLimitRules(
+        version=version,
+        tiers={tier["id"]: tier["name"] for tier in tiers_data["data"]},
+        limits={
+            (rate_limit["tier_id"], rate_limit["path"]): (
+                rate_limit["limit"],
+                rate_limit["period"],
+                rate_limit["algorithm"],
+                rate_limit["sync_hits"],
+                rate_limit["cost"],
+                rate_limit["cost_per_kb"],
+            )
+            for rate_limit in rate_limits_data["data"]
+        },
+        concurrency={tier["id"]: tier["max_concurrency"] for tier in tiers_data["data"] if tier.get("max_concurrency")},
+    )
+
+
+async def get_rules() -> RateLimitRules:
+    """Возвращает текущий снимок правил. При первом обращении загружает его из базы данных."""
+    if _rules is None:
+        await refresh()
+    return _rules  # type: ignore
+
+
+async def resolve_limit(path: str, user_id: int | None = None, tier_id: int | None = None) -> tuple[int, int, str, int, int, int]:
+    """Возвращает (limit, period, algorithm, sync_hits, cost, cost_per_kb) для запроса пользователя с тарифом `tier_id`
+    к очищенному пути.
+
+    Анонимным запросам, пользователям без тарифа и путям без правила назначается лимит по умолчанию.
+    Правила берутся из снимка в памяти воркера, запросов к базе данных здесь нет.
+    """
+    if user_id is None:
+        return DEFAULT_LIMIT, DEFAULT_PERIOD, DEFAULT_ALGORITHM, 0, 1, 0
+
+    rules = await get_rules()
+    tier_name = rules.get_tier_name(tier_id)
+    if not tier_name:
+        logger.warning(f"User {user_id} has no assigned tier. Applying default rate limit.")
+        return DEFAULT_LIMIT, DEFAULT_PERIOD, DEFAULT_ALGORITHM, 0, 1, 0
+
+    rate_limit = rules.get_limit(tier_id, path)  # type: ignore
+    if not rate_limit:
+        logger.warning(
+            f"User {user_id} with tier '{tier_name}' has no specific rate limit for path '{path}'. \
+                Applying default rate limit."
+        )
+        return DEFAULT_LIMIT, DEFAULT_PERIOD, DEFAULT_ALGORITHM, 0, 1, 0
+
+    return rate_limit
+
+
+async def resolve_max_concurrency(user_id: int | None = None, tier_id: int | None = None) -> int | None:
+    """Возвращает, сколько запросов пользователь с тарифом `tier_id` может выполнять одновременно.
+
+    None означает, что ограничения нет: для анонимных запросов, пользователей без тарифа
+    и тарифов без `max_concurrency`.
+    """
+    if user_id is None or tier_id is None:
+        return None
+
+    rules = await get_rules()
+    return rules.get_max_concurrency(tier_id)
+
+
+async def refresh(force: bool = False) -> None:
+    """Перезагружает правила из базы данных, если версия в Redis отличается от загруженной."""
+    global _rules
+
+    async with _lock:
+        version = await _read_version()
+        if not force and _rules is not None and _rules.version == version:
+            return
+
+        # Версия читается до загрузки: если правила изменятся во время нее, следующая проверка увидит новую версию.
+        async with db_helper.session_factory() as session:
+            _rules = await load_rules(session, version)
+        logger.info(f"Rate limit rules loaded: version {version}, {len(_rules.limits)} rules")
+
+
+async def bump_rules_version() -> None:
+    """Помечает правила измененными и сообщает об этом всем воркерам.
+
+    Вызывается после записи тарифов и правил ограничения запросов. Текущий воркер перезагружает
+    правила сразу, остальные получают сообщение через Redis pub/sub.
+
+    Примечание
+    ----------
+    Ошибка публикации не прерывает запрос: в этом случае другие воркеры обновят правила
+    при периодической проверке версии (`RATE_LIMIT_RULES_CHECK_INTERVAL`).
+    """
+    if redis_client.client is None:
+        raise MissingClientError
+
+    version = await redis_client.client.incr(RULES_VERSION_KEY)
+    try:
+        await broadcast.publish(RULES_CHANNEL, {"version": version})
+    except Exception as e:
+        logger.exception(f"Failed to broadcast rate limit rules update: {e}")
+
+    await refresh()
+
+
+async def _read_version() -> int:
+    if redis_client.client is None:
+        raise MissingClientError
+
+    version = await redis_client.client.get(RULES_VERSION_KEY)
+    return int(version) if version is not None else 0
+
+
+async def _refresh_in_background() -> None:
+    try:
+        await refresh()
+    except Exception as e:
+        logger.error(f"Failed to refresh rate limit rules: {e}")
+
+
+def _schedule_refresh() -> None:
+    task = asyncio.create_task(_refresh_in_background())
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+def handle_rules_message(message: dict[str, Any]) -> None:
+    if _rules is None or message.get("version") != _rules.version:
+        _schedule_refresh()
+
+
+def subscribe_to_rule_updates() -> None:
+    broadcast.subscribe(RULES_CHANNEL, handle_rules_message, reset=_schedule_refresh)
+
+
+async def _check_periodically() -> None:
+    # Подстраховка на случай потерянных сообщений pub/sub: сверяем версию с Redis.
+    while True:
+        await asyncio.sleep(CHECK_INTERVAL)
+        await _refresh_in_background()
+
+
+async def start_refresher() -> None:
+    global _check_task
+
+    try:
+        await refresh(force=True)
+    except Exception as e:
+        # Правила будут загружены при первом запросе.
+        logger.error(f"Failed to load rate limit rules on startup: {e}")
+
+    if _check_task is None:
+        _check_task = asyncio.create_task(_check_periodically())
+
+
+async def stop_refresher() -> None:
+    global _check_task
+
+    if _check_task is None:
+        return
+
+    _check_task.cancel()
+    try:
+        await _check_task
+    except asyncio.CancelledError:
+        pass
+    _check_task = None
@@ -1,4 +1,5 @@
 from redis.asyncio import ConnectionPool, Redis
+from redis.commands.core import AsyncScript
 
 # from ..config import settings
 
@@ -8,3 +9,14 @@ client: Redis | None = None
 # Инициализация пула соединений и клиента Redis
 # pool = ConnectionPool.from_url(settings.redis_client.REDIS_URL)
 # client = Redis(connection_pool=pool)
+
+_scripts: dict[str, AsyncScript] = {}
+
+
+def get_script(source: str) -> AsyncScript:
+    """Возвращает Lua-скрипт, привязанный к текущему клиенту. Скрипт вызывается через EVALSHA."""
+    script = _scripts.get(source)
+    if script is None or script.registered_client is not client:
+        script = client.register_script(source)  # type: ignore
+        _scripts[source] = script
+    return script
@@ -0,0 +1,194 @@
+import asyncio
+import time
+from typing import Any
+
+from app.core.config import settings
+from app.core.logger import logging
+from jwt import InvalidTokenError
+
+from ..exceptions.cache_exceptions import MissingClientError
+from . import auth_utils, broadcast, redis_client
+from .bloom_filter import BloomFilter
+
+logger = logging.getLogger(__name__)
+
+REVOKED_CHANNEL = settings.crypt.TOKEN_BLACKLIST_CHANNEL
+BLOOM_CAPACITY = settings.crypt.TOKEN_BLACKLIST_BLOOM_CAPACITY
+BLOOM_ERROR_RATE = settings.crypt.TOKEN_BLACKLIST_BLOOM_ERROR_RATE
+REBUILD_INTERVAL = settings.crypt.TOKEN_BLACKLIST_REBUILD_INTERVAL
+
+# Отозванный токен хранится в Redis до истечения срока его действия: `blacklist:{jti}`.
+# Sorted set со всеми jti (score - срок действия) нужен, чтобы воркер мог построить фильтр Блума при старте.
+REVOKED_SET_KEY = "blacklist:jtis"
+
+# Фильтр Блума воркера: jti, которых в нем нет, точно не отозваны, и Redis не спрашивается.
+# None - фильтр еще не построен, тогда каждый токен проверяется в Redis.
+_bloom: BloomFilter | None = None
+# jti, полученные через pub/sub во время построения фильтра: они добавляются в новый фильтр.
+_received: set[str] | None = None
+_lock = asyncio.Lock()
+_rebuild_tasks: set[asyncio.Task] = set()
+_rebuild_task: asyncio.Task | None = None
+
+
+def _get_key(jti: str) -> str:
+    return f"blacklist:{jti}"
+
+
+async def revoke_token(payload: dict[str, Any]) -> None:
+    """Отзывает токен по его `jti` до истечения срока действия (`exp`).
+
+    Токен записывается в Redis с TTL, равным оставшемуся сроку его действия, добавляется в фильтр Блума
+    текущего воркера, а остальные воркеры получают его jti через Redis pub/sub.
+
+    Примечание
+    ----------
+    Ошибка публикации не прерывает запрос: другие воркеры увидят токен при следующей перестройке
+    фильтра (`TOKEN_BLACKLIST_REBUILD_INTERVAL`) или после переподключения к Redis.
+    """
+    if redis_client.client is None:
+        raise MissingClientError
+
+    jti, expires_at = payload.get("jti"), payload.get("exp")
+    if not jti or not expires_at:
+        return
+
+    now = int(time.time())
+    ttl = int(expires_at) - now
+    if ttl <= 0:
+        return
+
+    async with redis_client.client.pipeline(transaction=True) as pipe:
+        pipe.set(_get_key(jti), 1, ex=ttl)
+        pipe.zadd(REVOKED_SET_KEY, {jti: int(expires_at)})
+        pipe.zremrangebyscore(REVOKED_SET_KEY, "-inf", now)
+        await pipe.execute()
+
+    _add(jti)
+    try:
+        await broadcast.publish(REVOKED_CHANNEL, {"jti": jti})
+    except Exception as e:
+        logger.exception(f"Failed to broadcast revoked token: {e}")
+
+
+async def revoke_tokens(access_payload: dict[str, Any], refresh_token: str | None = None) -> None:
+    """Отзывает access-токен запроса и refresh-токен из cookie. Недействительный refresh-токен пропускается."""
+    await revoke_token(access_payload)
+    if not refresh_token:
+        return
+
+    try:
+        refresh_payload = auth_utils.decode_jwt(token=refresh_token)
+    except InvalidTokenError:
+        return
+    await revoke_token(refresh_payload)
+
+
+async def is_token_revoked(jti: str | None) -> bool:
+    """Проверяет, отозван ли токен.
+
+    Большинство проверок отвечает фильтр Блума воркера без сетевого запроса. В Redis идут только jti,
+    которые есть в фильтре (отозванные и редкие ложноположительные), и все jti, пока фильтр не построен.
+    Если Redis недоступен, такой токен считается отозванным.
+    """
+    if not jti:
+        return False
+    if _bloom is not None and jti not in _bloom:
+        return False
+
+    if redis_client.client is None:
+        raise MissingClientError
+
+    try:
+        return bool(await redis_client.client.exists(_get_key(jti)))
+    except Exception as e:
+        logger.error(f"Failed to check token blacklist, rejecting token: {e}")
+        return True
+
+
+async def rebuild_filter() -> None:
+    """Строит фильтр Блума заново из Redis. Заодно из него уходят jti токенов с истекшим сроком действия."""
+    global _bloom, _received
+
+    if redis_client.client is None:
+        raise MissingClientError
+
+    async with _lock:
+        _received = set()
+        try:
+            await redis_client.client.zremrangebyscore(REVOKED_SET_KEY, "-inf", int(time.time()))
+            jtis = await redis_client.client.zrange(REVOKED_SET_KEY, 0, -1)
+
+            bloom = BloomFilter(max(BLOOM_CAPACITY, len(jtis)), BLOOM_ERROR_RATE)
+            for jti in jtis:
+                bloom.add(jti.decode())
+            for jti in _received:
+                bloom.add(jti)
+            _bloom = bloom
+        finally:
+            _received = None
+    logger.info(f"Token blacklist filter rebuilt: {bloom.count} revoked tokens")
+
+
+def _add(jti: str) -> None:
+    if _bloom is not None:
+        _bloom.add(jti)
+    if _received is not None:
+        _received.add(jti)
+
+
+async def _rebuild_in_background() -> None:
+    try:
+        await rebuild_filter()
+    except Exception as e:
+        logger.error(f"Failed to rebuild token blacklist filter: {e}")
+
+
+def _schedule_rebuild() -> None:
+    task = asyncio.create_task(_rebuild_in_background())
+    _rebuild_tasks.add(task)
+    task.add_done_callback(_rebuild_tasks.discard)
+
+
+def handle_revoked_message(message: dict[str, Any]) -> None:
+    jti = message.get("jti")
+    if jti:
+        _add(jti)
+
+
+def subscribe_to_revocations() -> None:
+    # После переподключения к Redis фильтр строится заново: сообщения за время разрыва потеряны.
+    broadcast.subscribe(REVOKED_CHANNEL, handle_revoked_message, reset=_schedule_rebuild)
+
+
+async def _rebuild_periodically() -> None:
+    while True:
+        await asyncio.sleep(REBUILD_INTERVAL)
+        await _rebuild_in_background()
+
+
+async def start_rebuilder() -> None:
+    global _rebuild_task
+
+    try:
+        await rebuild_filter()
+    except Exception as e:
+        # Пока фильтра нет, токены проверяются в Redis.
+        logger.error(f"Failed to build token blacklist filter on startup: {e}")
+
+    if _rebuild_task is None:
+        _rebuild_task = asyncio.create_task(_rebuild_periodically())
+
+
+async def stop_rebuilder() -> None:
+    global _rebuild_task
+
+    if _rebuild_task is None:
+        return
+
+    _rebuild_task.cancel()
+    try:
+        await _rebuild_task
+    except asyncio.CancelledError:
+        pass
+    _rebuild_task = None
@@ -3,9 +3,11 @@ import logging
 
 import uvloop
 from arq.worker import Worker
+from redis.asyncio import ConnectionPool, Redis
 
 asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 from ..config import settings
+from ..utils import cache_warmup, redis_client
 
 logging.basicConfig(
     level=settings.logging_config.LOG_LEVEL,
@@ -19,10 +21,20 @@ async def sample_background_task(ctx: Worker, name: str) -> str:
     return f"Task {name} is complete!"
 
 
+async def warm_up_cache(ctx: Worker, limit: int | None = None) -> dict[str, str]:
+    # Импорт регистрирует прогреватели кэша.
+    from ...crud import crud_posts, crud_users  # noqa: F401
+
+    return await cache_warmup.warm_up(limit)
+
+
 # -------- base functions --------
 async def startup(ctx: Worker) -> None:
+    redis_client.pool = ConnectionPool.from_url(settings.redis_client.REDIS_URL)
+    redis_client.client = Redis(connection_pool=redis_client.pool)  # type: ignore
     logging.info("Worker Started")
 
 
 async def shutdown(ctx: Worker) -> None:
+    await redis_client.client.aclose()  # type: ignore
     logging.info("Worker end")
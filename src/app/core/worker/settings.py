@@ -1,12 +1,15 @@
+from arq import func
 from arq.connections import RedisSettings
 
 from ..config import settings
-from .functions import sample_background_task, shutdown, startup
+from .functions import sample_background_task, shutdown, startup, warm_up_cache
 
 
 class WorkerSettings:
     functions = [
         sample_background_task,
+        # Результат не хранится: иначе ID задачи занят еще час после прогрева и повторный запуск игнорируется.
+        func(warm_up_cache, keep_result=0),
     ]
     redis_settings = RedisSettings(
         host=settings.redis_queue.REDIS_HOST,
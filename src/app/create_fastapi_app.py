@@ -10,7 +10,17 @@ from app.core.auth.dependencies import get_current_superadmin_user
 # from arq.connections import RedisSettings
 from app.core.config import EnvironmentOption, settings
 from app.core.logger import logging
-from app.core.utils import redis_client
+from app.core.utils import (
+    broadcast,
+    cache_metrics,
+    cache_warmup,
+    queue,
+    rate_limit,
+    rate_limit_rules,
+    redis_client,
+    token_blacklist,
+)
+from app.core.utils.local_cache import subscribe_to_invalidations
 from app.models import Base
 from fastapi import Depends, FastAPI
 from fastapi.openapi.docs import (
@@ -57,6 +67,76 @@ async def close_redis_pool() -> None:
     await redis_client.client.aclose()  # type: ignore
 
 
+# -------------- broadcast --------------
+async def start_broadcast_listener() -> None:
+    subscribe_to_invalidations()
+    rate_limit_rules.subscribe_to_rule_updates()
+    token_blacklist.subscribe_to_revocations()
+    await broadcast.start_listener()
+
+
+async def stop_broadcast_listener() -> None:
+    await broadcast.stop_listener()
+
+
+# -------------- cache metrics --------------
+async def start_cache_metrics_flusher() -> None:
+    await cache_metrics.start_flusher()
+
+
+async def stop_cache_metrics_flusher() -> None:
+    await cache_metrics.stop_flusher()
+
+
+# -------------- cache warm-up --------------
+async def start_hot_keys_flusher() -> None:
+    await cache_warmup.start_flusher()
+
+
+async def stop_hot_keys_flusher() -> None:
+    await cache_warmup.stop_flusher()
+
+
+async def enqueue_cache_warmup() -> None:
+    # Фиксированный ID задачи: каждый воркер gunicorn ставит ее при старте, но выполнится она один раз.
+    # Результат задачи не хранится (keep_result=0), поэтому после завершения ID снова свободен.
+    try:
+        await queue.pool.enqueue_job("warm_up_cache", _job_id=cache_warmup.WARMUP_JOB_ID)  # type: ignore
+    except Exception as e:
+        logger.error(f"Failed to enqueue cache warm-up: {e}")
+
+
+# -------------- rate limit --------------
+async def load_rate_limit_scripts() -> None:
+    await rate_limit.load_scripts()
+
+
+async def start_rate_limit_local_sync() -> None:
+    await rate_limit.start_local_sync()
+
+
+async def stop_rate_limit_local_sync() -> None:
+    await rate_limit.stop_local_sync()
+
+
+# -------------- rate limit rules --------------
+async def start_rate_limit_rules_refresher() -> None:
+    await rate_limit_rules.start_refresher()
+
+
+async def stop_rate_limit_rules_refresher() -> None:
+    await rate_limit_rules.stop_refresher()
+
+
+# -------------- token blacklist --------------
+async def start_token_blacklist_rebuilder() -> None:
+    await token_blacklist.start_rebuilder()
+
+
+async def stop_token_blacklist_rebuilder() -> None:
+    await token_blacklist.stop_rebuilder()
+
+
 # -------------- cache --------------
 # async def create_redis_cache_pool() -> None:
 #     cache.pool = ConnectionPool.from_url(settings.redis_cache.REDIS_CACHE_URL)
@@ -111,6 +191,16 @@ async def lifespan(app: FastAPI):
         await drop_tables()
 
     await create_redis_pool()
+    await start_broadcast_listener()
+    await start_cache_metrics_flusher()
+    await start_hot_keys_flusher()
+    await load_rate_limit_scripts()
+    await start_rate_limit_rules_refresher()
+    await start_rate_limit_local_sync()
+    await start_token_blacklist_rebuilder()
+
+    if settings.cache.CACHE_WARMUP_ON_STARTUP:
+        await enqueue_cache_warmup()
 
     # if isinstance(settings, RedisCacheSettings):
     #     await create_redis_cache_pool()
@@ -123,6 +213,12 @@ async def lifespan(app: FastAPI):
 
     yield
     # shutdown
+    await stop_token_blacklist_rebuilder()
+    await stop_rate_limit_local_sync()
+    await stop_rate_limit_rules_refresher()
+    await stop_hot_keys_flusher()
+    await stop_cache_metrics_flusher()
+    await stop_broadcast_listener()
     await close_redis_pool()
 
     # if isinstance(settings, RedisCacheSettings):
@@ -1,12 +1,17 @@
+from app.core.utils.cache_warmup import warmer
+from app.core.utils.caching import get_entity_page
 from app.models.post import Post
 from app.schemas.post import (
     PostCreateInternal,
     PostDelete,
     PostFilter,
+    PostRead,
     PostUpdate,
     PostUpdateInternal,
 )
 from fastcrud import FastCRUD
+from fastcrud.paginated import compute_offset
+from sqlalchemy.ext.asyncio import AsyncSession
 
 CRUDPost = FastCRUD[
     Post,
@@ -17,3 +22,44 @@ CRUDPost = FastCRUD[
     PostFilter,
 ]
 crud_posts = CRUDPost(Post)
+
+
+def user_posts_tag(user_id: int) -> str:
+    return f"posts:user:{user_id}"
+
+
+def user_posts_namespace(username: str) -> str:
+    return f"posts:{username}"
+
+
+@warmer("user_posts")
+async def get_user_posts_page(session: AsyncSession, user_id: int, page: int, items_per_page: int) -> dict:
+    async def load_page() -> dict:
+        return await crud_posts.get_multi(
+            db=session,
+            offset=compute_offset(page, items_per_page),
+            limit=items_per_page,
+            schema_to_select=PostRead,
+            created_by_user_id=user_id,
+            is_deleted=False,
+        )
+
+    async def load_posts(ids: list[int]) -> list[dict]:
+        posts_data = await crud_posts.get_multi(
+            db=session,
+            limit=None,
+            return_total_count=False,
+            schema_to_select=PostRead,
+            id__in=ids,
+            is_deleted=False,
+        )
+        return posts_data["data"]
+
+    # Страница хранит только ID постов, сами посты кэшируются отдельно и собираются одним MGET.
+    return await get_entity_page(
+        "post",
+        f"{user_posts_tag(user_id)}:page:{page}:{items_per_page}",
+        load_page=load_page,
+        load_missing=load_posts,
+        tags=[user_posts_tag(user_id)],
+    )
@@ -1,3 +1,5 @@
+from app.core.utils.cache_warmup import warmer
+from app.core.utils.principal_cache import get_principal
 from app.models.user import User
 from app.schemas.user import (
     UserCreateInternal,
@@ -7,6 +9,7 @@ from app.schemas.user import (
     UserUpdateInternal,
 )
 from fastcrud import FastCRUD
+from sqlalchemy.ext.asyncio import AsyncSession
 
 CRUDUser = FastCRUD[
     User,
@@ -17,3 +20,20 @@ CRUDUser = FastCRUD[
     UserFilter,
 ]
 crud_users = CRUDUser(User)
+
+
+def user_namespace(username: str) -> str:
+    return f"user:{username}"
+
+
+@warmer("principal")
+async def get_user_principal(session: AsyncSession, user_id: int) -> dict | None:
+    """Пользователь для аутентификации: из кэша пользователей, при промахе - из базы данных."""
+    return await get_principal(
+        user_id,
+        lambda: crud_users.get(
+            db=session,
+            id=user_id,
+            is_deleted=False,
+        ),
+    )
@@ -1,8 +1,10 @@
 import uvicorn
 from app.api.auth import router as auth_router
+from app.api.dependencies import client_cache, rate_limiter
 from app.api.v1 import router as api_v1_router
 from app.core.config import settings
 from app.core.logger import logging
+from app.core.middleware import ClientCacheMiddleware, RateLimitMiddleware
 from app.create_fastapi_app import create_app
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -20,6 +22,16 @@ main_app.include_router(
 )
 
 
+main_app.add_middleware(
+    ClientCacheMiddleware,
+    dependency=client_cache,
+    max_age=settings.client_side_cache.CLIENT_CACHE_MAX_AGE,
+)
+# Внутри CORS, чтобы ответ 429 тоже получил CORS-заголовки.
+main_app.add_middleware(
+    RateLimitMiddleware,
+    dependency=rate_limiter,
+)
 main_app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # В продакшене замените на конкретные домены
@@ -10,4 +10,8 @@ class RateLimit(IntIdPkMixin, TimestampMixin, Base):
     path: Mapped[str] = mapped_column(String, nullable=False)
     limit: Mapped[int] = mapped_column(Integer, nullable=False)
     period: Mapped[int] = mapped_column(Integer, nullable=False)
+    algorithm: Mapped[str] = mapped_column(String, nullable=False, default="fixed_window", server_default="fixed_window")
+    sync_hits: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    cost: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+    cost_per_kb: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
     tier_id: Mapped[int] = mapped_column(ForeignKey("tiers.id"), index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import String
+from sqlalchemy import Integer, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base
@@ -7,3 +7,4 @@ from .mixins import IntIdPkMixin, SoftDeleteMixin, TimestampMixin
 
 class Tier(IntIdPkMixin, TimestampMixin, SoftDeleteMixin, Base):
     name: Mapped[str] = mapped_column(String, nullable=False, unique=True)
+    max_concurrency: Mapped[int | None] = mapped_column(Integer, nullable=True)
@@ -1,4 +1,5 @@
 from datetime import datetime
+from enum import Enum
 from typing import Annotated
 
 from pydantic import BaseModel, ConfigDict, Field, field_validator
@@ -10,10 +11,26 @@ def sanitize_path(path: str) -> str:
     return path.strip("/").replace("/", "_")
 
 
+class RateLimitAlgorithm(str, Enum):
+    FIXED_WINDOW = "fixed_window"
+    SLIDING_WINDOW = "sliding_window"
+    TOKEN_BUCKET = "token_bucket"
+    GCRA = "gcra"
+
+
 class RateLimitBase(BaseModel):
+    # В базе данных алгоритм хранится строкой.
+    model_config = ConfigDict(use_enum_values=True)
+
     path: Annotated[str, Field(examples=["users"])]
     limit: Annotated[int, Field(examples=[5])]
     period: Annotated[int, Field(examples=[60])]
+    algorithm: Annotated[RateLimitAlgorithm, Field(default=RateLimitAlgorithm.FIXED_WINDOW, examples=["gcra"])]
+    # Приближенный режим для фиксированного окна: синхронизация с Redis раз в sync_hits запросов (0 - выключен).
+    sync_hits: Annotated[int, Field(default=0, ge=0, examples=[0])]
+    # Стоимость запроса в единицах лимита: cost плюс cost_per_kb за каждый килобайт тела (по Content-Length).
+    cost: Annotated[int, Field(default=1, ge=1, examples=[1])]
+    cost_per_kb: Annotated[int, Field(default=0, ge=0, examples=[0])]
 
     @field_validator("path")
     def validate_and_sanitize_path(cls, v: str) -> str:
@@ -42,9 +59,15 @@ class RateLimitCreateInternal(RateLimitCreate):
 
 
 class RateLimitUpdate(BaseModel):
+    model_config = ConfigDict(use_enum_values=True)
+
     path: str | None = Field(default=None)
     limit: int | None = None
     period: int | None = None
+    algorithm: RateLimitAlgorithm | None = None
+    sync_hits: int | None = Field(default=None, ge=0)
+    cost: int | None = Field(default=None, ge=1)
+    cost_per_kb: int | None = Field(default=None, ge=0)
     name: str | None = None
 
     @field_validator("path")
@@ -8,6 +8,8 @@ from .mixins import TimestampSchema
 
 class TierBase(BaseModel):
     name: Annotated[str, Field(examples=["free"])]
+    # Сколько запросов пользователь тарифа может выполнять одновременно (None - без ограничения).
+    max_concurrency: Annotated[int | None, Field(default=None, ge=1, examples=[10])]
 
 
 class Tier(TimestampSchema, TierBase):
@@ -29,6 +31,7 @@ class TierCreateInternal(TierCreate):
 
 class TierUpdate(BaseModel):
     name: str | None = None
+    max_concurrency: int | None = Field(default=None, ge=1)
 
 
 class TierUpdateInternal(TierUpdate):
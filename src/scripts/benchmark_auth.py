@@ -0,0 +1,72 @@
+"""Measures the authentication overhead per request with and without the verified-token cache (`JWT_CACHE_MAX_SIZE`):
+verifying the RS256 access token and checking it against the token blacklist.
+
+Every request comes from one of `--clients` clients, each reusing its own access token the way a browser does
+until the token expires. The "with cache" run keeps up to `--cache-size` tokens (`JWT_CACHE_MAX_SIZE` by default).
+The blacklist check is answered by the worker's Bloom filter, so no Redis is needed:
+
+    python -m src.scripts.benchmark_auth --requests 20000 --clients 100 --cache-size 4096
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.core.auth.helpers import create_access_token
+from app.core.logger import logging
+from app.core.utils import auth_utils, token_blacklist
+from app.core.utils.bloom_filter import BloomFilter
+from app.core.utils.local_cache import LocalCache
+
+logger = logging.getLogger(__name__)
+
+
+async def measure(label: str, tokens: list[str], requests: int, cache_size: int) -> float:
+    # Кэш создается заново: его размер задается при создании, а не читается из JWT_CACHE_MAX_SIZE.
+    auth_utils.JWT_CACHE_MAX_SIZE = cache_size
+    auth_utils._verified_tokens = LocalCache(max_size=cache_size, ttl=auth_utils._verified_tokens.ttl)
+
+    start = time.perf_counter()
+    for i in range(requests):
+        payload = auth_utils.decode_jwt(token=tokens[i % len(tokens)])
+        await token_blacklist.is_token_revoked(payload["jti"])
+    per_request = (time.perf_counter() - start) / requests
+
+    logger.info(
+        f"{label:>14}: {per_request * 1_000_000:.1f} us per request, {1 / per_request:.0f} requests/s, "
+        f"{len(auth_utils._verified_tokens)} tokens cached"
+    )
+    return per_request
+
+
+async def run(requests: int, clients: int, cache_size: int) -> None:
+    token_blacklist._bloom = BloomFilter(token_blacklist.BLOOM_CAPACITY, token_blacklist.BLOOM_ERROR_RATE)
+    tokens = [
+        await create_access_token({"id": client, "username": f"bench{client}", "email": f"bench{client}@example.com"})
+        for client in range(clients)
+    ]
+
+    without_cache = await measure("without cache", tokens, requests, 0)
+    with_cache = await measure("with cache", tokens, requests, cache_size)
+    logger.info(f"verified-token cache: {without_cache / with_cache:.1f}x less auth overhead per request")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000, help="authenticated requests to simulate")
+    parser.add_argument("--clients", type=int, default=100, help="distinct access tokens in use")
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=auth_utils.JWT_CACHE_MAX_SIZE or 4096,
+        help="verified tokens kept in the cache during the cached run",
+    )
+    args = parser.parse_args()
+    if args.cache_size <= 0:
+        parser.error("--cache-size must be positive")
+
+    asyncio.run(run(args.requests, args.clients, args.cache_size))
+
+
+if __name__ == "__main__":
+    main()
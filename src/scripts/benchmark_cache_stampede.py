@@ -0,0 +1,96 @@
+"""Counts how many times the endpoint body (the "database query") runs when N concurrent requests miss the same cache key.
+
+Every worker process fires its share of the requests at once, so without coalescing each of them
+would hit the database. Run it against a real Redis (`REDIS_CLIENT_HOST` / `REDIS_CLIENT_PORT`):
+
+    python -m src.scripts.benchmark_cache_stampede --workers 4 --requests 200
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import uuid
+
+from app.core.config import settings
+from app.core.logger import logging
+from app.core.utils import caching, redis_client
+from redis import Redis as SyncRedis
+from redis.asyncio import ConnectionPool, Redis
+from starlette.requests import Request
+
+logger = logging.getLogger(__name__)
+
+DB_CALLS_KEY_PREFIX = "benchmark:stampede:db_calls:"
+
+
+def _make_request() -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/benchmark", "headers": [], "query_string": b""})
+
+
+def _build_endpoint(lock_timeout: float | None, db_latency: float):
+    @caching.cache(key_prefix="benchmark:stampede", resource_id_name="run_id", expiration=60, lock_timeout=lock_timeout)
+    async def endpoint(request: Request, run_id: str) -> dict:
+        await redis_client.client.incr(f"{DB_CALLS_KEY_PREFIX}{run_id}")  # type: ignore
+        await asyncio.sleep(db_latency)
+        return {"run_id": run_id}
+
+    return endpoint
+
+
+async def _run_worker(run_id: str, concurrency: int, lock_timeout: float | None, db_latency: float, barrier) -> None:
+    redis_client.pool = ConnectionPool.from_url(settings.redis_client.REDIS_URL)
+    redis_client.client = Redis(connection_pool=redis_client.pool)
+    endpoint = _build_endpoint(lock_timeout, db_latency)
+    try:
+        barrier.wait()
+        await asyncio.gather(*(endpoint(_make_request(), run_id=run_id) for _ in range(concurrency)))
+    finally:
+        await redis_client.client.aclose()
+
+
+def _worker_main(run_id: str, concurrency: int, lock_timeout: float | None, db_latency: float, barrier) -> None:
+    asyncio.run(_run_worker(run_id, concurrency, lock_timeout, db_latency, barrier))
+
+
+def run_scenario(workers: int, requests: int, lock_timeout: float | None, db_latency: float) -> int:
+    run_id = uuid.uuid4().hex
+    barrier = multiprocessing.Barrier(workers)
+    processes = [
+        multiprocessing.Process(
+            target=_worker_main,
+            args=(run_id, requests // workers, lock_timeout, db_latency, barrier),
+        )
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    client = SyncRedis.from_url(settings.redis_client.REDIS_URL)
+    try:
+        db_calls = int(client.get(f"{DB_CALLS_KEY_PREFIX}{run_id}") or 0)
+        client.delete(f"{DB_CALLS_KEY_PREFIX}{run_id}", f"benchmark:stampede:{run_id}")
+    finally:
+        client.close()
+    return db_calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="number of worker processes (gunicorn workers)")
+    parser.add_argument("--requests", type=int, default=200, help="total concurrent requests across all workers")
+    parser.add_argument("--db-latency", type=float, default=0.2, help="simulated query time in seconds")
+    parser.add_argument("--lock-timeout", type=float, default=1.0, help="lock_timeout passed to the cache decorator")
+    args = parser.parse_args()
+
+    for lock_timeout in (None, args.lock_timeout):
+        db_calls = run_scenario(args.workers, args.requests, lock_timeout, args.db_latency)
+        logger.info(
+            f"workers={args.workers} requests={args.requests} lock_timeout={lock_timeout}: "
+            f"{db_calls} database call(s) for {args.requests} concurrent misses"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Compares the rate limiting algorithms: Redis commands per decision, keys and memory per tracked client,
+and how many requests get through around a window boundary.
+
+Every client sends a burst of requests to one path. Commands are counted with INFO commandstats, which also
+counts the commands run inside the Lua scripts; memory is the MEMORY USAGE sum of the keys left behind.
+Run it against a real Redis (`REDIS_CLIENT_HOST` / `REDIS_CLIENT_PORT`), ideally one nobody else is using:
+
+    python -m src.scripts.benchmark_rate_limit --clients 1000 --requests 10 --limit 5 --period 60
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+from app.core.config import settings
+from app.core.logger import logging
+from app.core.utils import rate_limit, redis_client
+from app.schemas.rate_limit import RateLimitAlgorithm
+from redis.asyncio import ConnectionPool, Redis
+
+logger = logging.getLogger(__name__)
+
+PATH = "benchmark/rate_limit"
+
+
+async def _command_calls() -> dict[str, int]:
+    stats = await redis_client.client.info("commandstats")  # type: ignore
+    return {name: value["calls"] for name, value in stats.items()}
+
+
+async def _keys_memory(pattern: str) -> tuple[int, int]:
+    keys, memory = 0, 0
+    async for key in redis_client.client.scan_iter(match=pattern, count=1000):  # type: ignore
+        keys += 1
+        memory += await redis_client.client.memory_usage(key) or 0  # type: ignore
+    return keys, memory
+
+
+async def measure_costs(algorithm: RateLimitAlgorithm, clients: int, requests: int, limit: int, period: int) -> None:
+    run_id = uuid.uuid4().hex[:8]
+    before = await _command_calls()
+    for client in range(clients):
+        for _ in range(requests):
+            await rate_limit.check_rate_limit(f"bench-{run_id}-{client}", PATH, limit, period, algorithm)
+    after = await _command_calls()
+
+    decisions = clients * requests
+    # Сам вызов INFO тоже попадает в статистику.
+    commands = sum(after.values()) - sum(before.values()) - 1
+    round_trips = after.get("cmdstat_evalsha", 0) - before.get("cmdstat_evalsha", 0)
+    keys, memory = await _keys_memory(f"ratelimit:bench-{run_id}-*")
+    logger.info(
+        f"{algorithm.value:>14}: {round_trips / decisions:.2f} round trip(s) and {commands / decisions:.2f} Redis command(s) "
+        f"per decision, {keys / clients:.2f} key(s) and {memory / clients:.0f} bytes per client"
+    )
+
+    async for key in redis_client.client.scan_iter(match=f"ratelimit:bench-{run_id}-*", count=1000):  # type: ignore
+        await redis_client.client.unlink(key)  # type: ignore
+
+
+async def measure_boundary_burst(algorithm: RateLimitAlgorithm, limit: int, period: int) -> None:
+    """Отправляет 2 * limit запросов перед границей фиксированного окна и столько же сразу после нее."""
+    user_id = f"bench-{uuid.uuid4().hex[:8]}"
+    delay = period - time.time() % period - 0.2
+    await asyncio.sleep(delay if delay > 0 else delay + period)
+
+    allowed = 0
+    for _ in range(2):
+        for _ in range(2 * limit):
+            result = await rate_limit.check_rate_limit(user_id, PATH, limit, period, algorithm)
+            allowed += not result.limited
+        await asyncio.sleep(0.4)
+
+    logger.info(f"{algorithm.value:>14}: {allowed} of {4 * limit} requests allowed within ~0.4s around a window boundary")
+    async for key in redis_client.client.scan_iter(match=f"ratelimit:{user_id}:*"):  # type: ignore
+        await redis_client.client.unlink(key)  # type: ignore
+
+
+async def run(clients: int, requests: int, limit: int, period: int, boundary_period: int) -> None:
+    redis_client.pool = ConnectionPool.from_url(settings.redis_client.REDIS_URL)
+    redis_client.client = Redis(connection_pool=redis_client.pool)
+    try:
+        await rate_limit.load_scripts()
+        for algorithm in RateLimitAlgorithm:
+            await measure_costs(algorithm, clients, requests, limit, period)
+        if boundary_period:
+            for algorithm in RateLimitAlgorithm:
+                await measure_boundary_burst(algorithm, limit, boundary_period)
+    finally:
+        await redis_client.client.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=1000, help="number of tracked clients")
+    parser.add_argument("--requests", type=int, default=10, help="requests per client")
+    parser.add_argument("--limit", type=int, default=5, help="requests allowed per period")
+    parser.add_argument("--period", type=int, default=60, help="period in seconds")
+    parser.add_argument(
+        "--boundary-period",
+        type=int,
+        default=2,
+        help="period used for the window boundary test (0 to skip it); each algorithm waits for one boundary",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(run(args.clients, args.requests, args.limit, args.period, args.boundary_period))
+
+
+if __name__ == "__main__":
+    main()
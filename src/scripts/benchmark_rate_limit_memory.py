@@ -0,0 +1,100 @@
+"""Compares the memory used by the rate limit counters in the two storage layouts (`RATE_LIMIT_STORAGE`):
+one string key per client and path ("keys") and one hash per client with a field per path ("hash").
+
+Every client sends one request to each of `--paths` paths, so each layout ends up holding the same counters.
+Memory is the growth of INFO memory `used_memory`, which includes the per-key overhead of the Redis keyspace
+that MEMORY USAGE does not show. Run it against a real Redis (`REDIS_CLIENT_HOST` / `REDIS_CLIENT_PORT`)
+that nobody else is using, otherwise other writes end up in the numbers:
+
+    python -m src.scripts.benchmark_rate_limit_memory --clients 100000 --paths 5 --period 60
+"""
+
+import argparse
+import asyncio
+import uuid
+
+from app.core.config import settings
+from app.core.logger import logging
+from app.core.utils import rate_limit, redis_client
+from app.schemas.rate_limit import RateLimitAlgorithm
+from redis.asyncio import ConnectionPool, Redis
+
+logger = logging.getLogger(__name__)
+
+LIMIT = 1000
+
+
+async def _used_memory() -> int:
+    info = await redis_client.client.info("memory")  # type: ignore
+    return info["used_memory"]
+
+
+async def _keys(pattern: str) -> int:
+    keys = 0
+    async for _ in redis_client.client.scan_iter(match=pattern, count=1000):  # type: ignore
+        keys += 1
+    return keys
+
+
+async def _cleanup(pattern: str) -> None:
+    async for key in redis_client.client.scan_iter(match=pattern, count=1000):  # type: ignore
+        await redis_client.client.unlink(key)  # type: ignore
+
+
+async def measure_storage(
+    storage: rate_limit.RateLimitStorage,
+    algorithm: RateLimitAlgorithm,
+    clients: int,
+    paths: int,
+    period: int,
+    concurrency: int,
+) -> None:
+    rate_limit.STORAGE = storage
+    run_id = uuid.uuid4().hex[:8]
+    pattern = f"ratelimit:bench-{run_id}-*"
+
+    async def send(client: int) -> None:
+        for path in range(paths):
+            await rate_limit.check_rate_limit(f"bench-{run_id}-{client}", f"benchmark/path{path}", LIMIT, period, algorithm)
+
+    before = await _used_memory()
+    for start in range(0, clients, concurrency):
+        await asyncio.gather(*(send(client) for client in range(start, min(start + concurrency, clients))))
+    after = await _used_memory()
+
+    keys = await _keys(pattern)
+    logger.info(
+        f"{storage.value:>4} / {algorithm.value:>14}: {keys / clients:.2f} key(s) and "
+        f"{(after - before) / clients:.0f} bytes per client, {(after - before) / 1024 / 1024:.1f} MiB in total"
+    )
+    await _cleanup(pattern)
+
+
+async def run(clients: int, paths: int, period: int, concurrency: int) -> None:
+    redis_client.pool = ConnectionPool.from_url(settings.redis_client.REDIS_URL)
+    redis_client.client = Redis(connection_pool=redis_client.pool)
+    try:
+        await rate_limit.load_scripts()
+        listpack = await redis_client.client.config_get("hash-max-listpack-entries")
+        logger.info(f"hash-max-listpack-entries: {listpack.get('hash-max-listpack-entries', 'n/a')}")
+        # Token bucket и GCRA хранят состояние по пути в обоих вариантах, поэтому сравниваются только окна.
+        for algorithm in (RateLimitAlgorithm.FIXED_WINDOW, RateLimitAlgorithm.SLIDING_WINDOW):
+            for storage in rate_limit.RateLimitStorage:
+                await measure_storage(storage, algorithm, clients, paths, period, concurrency)
+    finally:
+        await redis_client.client.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=100000, help="number of tracked clients")
+    parser.add_argument("--paths", type=int, default=5, help="rate limited paths requested by every client")
+    parser.add_argument("--period", type=int, default=60, help="period in seconds")
+    parser.add_argument("--concurrency", type=int, default=200, help="clients sending requests at the same time")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.clients, args.paths, args.period, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import os
+import tempfile
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+os.environ.setdefault("ENVIRONMENT", "local")
+
+from app.core.config import settings  # noqa: E402
+
+
+def _write_jwt_keys() -> None:
+    """Создает пару ключей RS256 для тестов: ключи из src/certs в репозиторий не входят."""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    certs = Path(tempfile.mkdtemp(prefix="jwt-certs-"))
+    private_key = certs / "jwt-private.pem"
+    public_key = certs / "jwt-public.pem"
+    private_key.write_bytes(
+        key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+    public_key.write_bytes(
+        key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+    )
+    settings.crypt.PRIVATE_KEY = private_key
+    settings.crypt.PUBLIC_KEY = public_key
+
+
+# Ключи читаются при импорте auth_utils, поэтому подменяются до импорта тестовых модулей.
+_write_jwt_keys()
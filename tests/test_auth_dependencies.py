@@ -0,0 +1,191 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+
+import fakeredis
+import httpx
+from app.api.v1 import router as api_v1_router
+from app.core import db_helper
+from app.core.auth.helpers import create_access_token, create_refresh_token
+from app.core.config import settings
+from app.core.utils import rate_limit_rules as rules_module
+from app.core.utils import redis_client, token_blacklist
+from app.core.utils.local_cache import local_cache
+from app.main import main_app
+from app.models import Base
+from app.models.rate_limit import RateLimit
+from app.models.tier import Tier
+from app.models.user import User
+from app.schemas.rate_limit import sanitize_path
+from fastapi import FastAPI
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.schema import CreateColumn
+
+POSTS_PATH = f"{settings.api.prefix}{settings.api_v1.prefix}{settings.api_v1.post_prefix}/"
+
+
+@compiles(CreateColumn, "sqlite")
+def _sqlite_column(element, compiler, **kw) -> str:
+    """Заменяет серверные значения по умолчанию PostgreSQL на аналоги SQLite."""
+    column = element.element
+    if column.autoincrement is True and len(column.table.primary_key.columns) > 1:
+        # SQLite не поддерживает автоинкремент в составном первичном ключе (users: id, uuid).
+        return f"{column.name} {compiler.dialect.type_compiler_instance.process(column.type)} NOT NULL"
+    return (
+        compiler.visit_create_column(element, **kw)
+        .replace("current_timestamp(0)", "CURRENT_TIMESTAMP")
+        .replace("gen_random_uuid()", "lower(hex(randomblob(16)))")
+    )
+
+
+# То же приложение без middleware: ограничение запросов выполняет зависимость `rate_limiter`.
+bare_app = FastAPI()
+bare_app.include_router(api_v1_router, prefix=settings.api.prefix)
+
+
+def run(scenario: Callable[[httpx.AsyncClient, "Database"], Awaitable[None]], app: FastAPI = main_app) -> None:
+    """Выполняет сценарий в одном цикле событий с базой данных SQLite в памяти и fakeredis."""
+
+    async def main() -> None:
+        database = await Database.create()
+        redis_client.client = fakeredis.FakeAsyncRedis()
+        rules_module._rules = None
+        token_blacklist._bloom = None
+        local_cache.clear()
+
+        db_helper.session_factory, session_factory = database.session_factory, db_helper.session_factory
+
+        async def session_getter():
+            async with database.session_factory() as session:
+                yield session
+
+        app.dependency_overrides[db_helper.session_getter] = session_getter
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                await scenario(client, database)
+        finally:
+            app.dependency_overrides.clear()
+            db_helper.session_factory = session_factory
+            await redis_client.client.aclose()
+            redis_client.client = None
+            await database.engine.dispose()
+
+    asyncio.run(main())
+
+
+class Database:
+    """SQLite в памяти со схемой приложения и счетчиком запросов к таблице users."""
+
+    def __init__(self, engine) -> None:
+        self.engine = engine
+        self.session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+        self.user_selects = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._count)
+
+    @classmethod
+    async def create(cls) -> "Database":
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        return cls(engine)
+
+    def _count(self, conn, cursor, statement: str, parameters, context, executemany) -> None:
+        if statement.lstrip().upper().startswith("SELECT") and "FROM users" in statement:
+            self.user_selects += 1
+
+    async def add_tier(self, limit: int) -> int:
+        async with self.session_factory() as session:
+            tier = Tier(name=f"tier-{limit}")
+            session.add(tier)
+            await session.flush()
+            session.add(RateLimit(name=f"posts-{limit}", path=sanitize_path(POSTS_PATH), limit=limit, period=60, tier_id=tier.id))
+            await session.commit()
+            return tier.id
+
+    async def add_user(self, limit: int = 100) -> dict:
+        tier_id = await self.add_tier(limit)
+        async with self.session_factory() as session:
+            # id задается явно: см. _sqlite_column.
+            user = User(
+                id=1,
+                name="User",
+                username="user",
+                email="user@example.com",
+                hashed_password="",
+                is_superuser=True,
+                tier_id=tier_id,
+            )
+            session.add(user)
+            await session.commit()
+            return {"id": user.id, "username": user.username, "email": user.email}
+
+
+async def create_post(client: httpx.AsyncClient, token: str) -> httpx.Response:
+    return await client.post(
+        POSTS_PATH,
+        json={"title": "Title", "text": "Text"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+
+def check_user_selects_per_request(app: FastAPI) -> None:
+    async def scenario(client: httpx.AsyncClient, database: Database) -> None:
+        user = await database.add_user()
+        token = await create_access_token(user)
+
+        database.user_selects = 0
+        response = await create_post(client, token)
+        assert response.status_code == 201, response.text
+        assert database.user_selects <= 1
+
+        database.user_selects = 0
+        response = await create_post(client, token)
+        assert response.status_code == 201, response.text
+        assert database.user_selects == 0
+
+    run(scenario, app)
+
+
+def test_create_post_loads_user_once_through_middleware() -> None:
+    check_user_selects_per_request(main_app)
+
+
+def test_create_post_loads_user_once_through_rate_limiter() -> None:
+    check_user_selects_per_request(bare_app)
+
+
+def test_rejected_token_loads_no_user() -> None:
+    async def scenario(client: httpx.AsyncClient, database: Database) -> None:
+        user = await database.add_user()
+        token = await create_refresh_token(user)
+
+        database.user_selects = 0
+        response = await create_post(client, token)
+        assert response.status_code == 401
+        assert database.user_selects == 0
+
+    run(scenario, bare_app)
+
+
+def test_tier_change_applies_to_issued_token() -> None:
+    async def scenario(client: httpx.AsyncClient, database: Database) -> None:
+        user = await database.add_user(limit=1)
+        tier_id = await database.add_tier(limit=100)
+        token = await create_access_token(user)
+
+        assert (await create_post(client, token)).status_code == 201
+        assert (await create_post(client, token)).status_code == 429
+
+        response = await client.patch(
+            f"{settings.api.prefix}{settings.api_v1.prefix}{settings.api_v1.user_prefix}/{user['username']}/tier",
+            json={"tier_id": tier_id},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert response.status_code == 200, response.text
+        # Тот же токен: уровень берется из кэша пользователя, а не из claims.
+        assert (await create_post(client, token)).status_code == 201
+
+    run(scenario)